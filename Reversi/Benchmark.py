@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from Bitboard import iterate_bits
+from Game import Game
+from SelfPlay import BotConfig
+
+
+class Benchmark:
+
+    SIZES = list(range(4, 17, 2))
+    PERCENTILES = [50, 90, 99]
+    CORPUS_SEED = 37001
+    THROUGHPUT_METRICS = ['move_generation', 'make_undo']
+
+    def __init__(self, sizes=None, positions=20, repeats=20, hard_bot='hard:time=0.2'):
+        self.sizes = sizes if sizes is not None else self.SIZES
+        self.positions = positions
+        self.repeats = repeats
+        self.bots = [BotConfig(name.lower()) for name in Game.BOT_DIFFICULTIES[:2]] + [BotConfig(hard_bot)]
+
+    def get_corpus(self, size):
+        generator = random.Random(self.CORPUS_SEED + size)
+        corpus = []
+        while len(corpus) < self.positions:
+            game = Game(True, size, True, False, 0)
+            plies = generator.randrange(size * size - 4)
+            turns = []
+            for _ in range(plies):
+                moves = list(iterate_bits(game.board.get_moves(game.is_white_turn)))
+                if len(moves) == 0:
+                    game.pass_turn()
+                    turns.append(None)
+                    continue
+                turn = generator.choice(moves)
+                game.make_turn(game.to_point(turn))
+                turns.append(turn)
+            if not game.is_finished:
+                corpus.append(turns)
+        return corpus
+
+    @staticmethod
+    def replay(size, turns):
+        game = Game(True, size, True, False, 0)
+        for turn in turns:
+            if turn is None:
+                game.pass_turn()
+            else:
+                game.make_turn(game.to_point(turn))
+        return game
+
+    def measure_move_generation(self, games):
+        calls = 0
+        start = time.perf_counter()
+        for _ in range(self.repeats):
+            for game in games:
+                game.board.get_moves(True)
+                game.board.get_moves(False)
+                calls += 2
+        return calls / (time.perf_counter() - start)
+
+    def measure_make_undo(self, games):
+        moves = [(game.board, list(iterate_bits(game.board.get_moves(game.is_white_turn))), game.is_white_turn)
+                 for game in games]
+        calls = 0
+        start = time.perf_counter()
+        for _ in range(self.repeats):
+            for board, board_moves, is_white in moves:
+                for move in board_moves:
+                    board.place(move, is_white)
+                    board.undo()
+                    calls += 1
+        return calls / (time.perf_counter() - start)
+
+    def measure_latency(self, size, corpus, bot):
+        times = []
+        search = bot.create_search()
+        try:
+            for turns in corpus:
+                game = self.replay(size, turns)
+                search.table.clear()
+                start = time.perf_counter()
+                bot.make_turn(game, search)
+                times.append(time.perf_counter() - start)
+        finally:
+            search.close()
+        return self.get_percentiles(times)
+
+    def get_percentiles(self, times):
+        times = sorted(times)
+        result = {}
+        for percentile in self.PERCENTILES:
+            index = min(len(times) - 1, int(round(percentile / 100 * (len(times) - 1))))
+            result[f'p{percentile}'] = times[index]
+        result['max'] = times[-1]
+        return result
+
+    def run_size(self, size):
+        corpus = self.get_corpus(size)
+        games = [self.replay(size, turns) for turns in corpus]
+        result = {
+            'move_generation': self.measure_move_generation(games),
+            'make_undo': self.measure_make_undo(games),
+        }
+        for bot in self.bots:
+            result[Game.BOT_DIFFICULTIES[bot.difficulty].lower()] = self.measure_latency(size, corpus, bot)
+        return result
+
+    def run(self, log=None):
+        results = {}
+        for size in self.sizes:
+            results[str(size)] = self.run_size(size)
+            if log is not None:
+                log(f'{size}x{size}: {json.dumps(results[str(size)])}')
+        return {
+            'python': platform.python_version(),
+            'positions': self.positions,
+            'hard_bot': str(self.bots[2]),
+            'sizes': results,
+        }
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    for size, metrics in current['sizes'].items():
+        if size not in baseline['sizes']:
+            continue
+        old_metrics = baseline['sizes'][size]
+        for name, value in metrics.items():
+            if name not in old_metrics:
+                continue
+            if name in Benchmark.THROUGHPUT_METRICS:
+                old_value = old_metrics[name]
+                if value < old_value * (1 - threshold):
+                    regressions.append((size, name, old_value, value))
+            else:
+                for percentile, latency in value.items():
+                    old_latency = old_metrics[name].get(percentile)
+                    if old_latency is not None and latency > old_latency * (1 + threshold):
+                        regressions.append((size, f'{name} {percentile}', old_latency, latency))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Reversi engine and bots per board size.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=Benchmark.SIZES)
+    run_parser.add_argument('--positions', type=int, default=20)
+    run_parser.add_argument('--repeats', type=int, default=20)
+    run_parser.add_argument('--hard', default='hard:time=0.2', help='hard bot settings, as in SelfPlay.py')
+    run_parser.add_argument('--output', default=None, help='JSON file for the results (default: stdout)')
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='allowed relative slowdown')
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == 'run':
+        benchmark = Benchmark(arguments.sizes, arguments.positions, arguments.repeats, arguments.hard)
+        results = benchmark.run(lambda line: print(line, file=sys.stderr))
+        text = json.dumps(results, indent=2)
+        if arguments.output is None:
+            print(text)
+        else:
+            with open(arguments.output, 'w') as file:
+                file.write(text)
+        return 0
+
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)
+    with open(arguments.current) as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, arguments.threshold)
+    for size, name, old_value, value in regressions:
+        print(f'REGRESSION {size}x{size} {name}: {old_value:.6g} -> {value:.6g}')
+    if len(regressions) == 0:
+        print('No regressions')
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
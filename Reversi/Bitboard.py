@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+
+import random
+
+
+class BoardTables:
+
+    ZOBRIST_SEED = 37001
+    TABLES = {}
+
+    def __init__(self, size):
+        self.size = size
+        self.full = (1 << size * size) - 1
+        self.shifts = self.get_shifts()
+        self.rays, self.neighbours = self.get_rays_neighbours()
+        last = size - 1
+        self.corners = 0
+        for x, y in ((0, 0), (last, 0), (0, last), (last, last)):
+            self.corners |= 1 << y * size + x
+        generator = random.Random(self.ZOBRIST_SEED + size)
+        self.white_keys = [generator.getrandbits(64) for _ in range(size * size)]
+        self.black_keys = [generator.getrandbits(64) for _ in range(size * size)]
+        self.flip_keys = [white_key ^ black_key for white_key, black_key in zip(self.white_keys, self.black_keys)]
+        self.side_key = generator.getrandbits(64)
+
+    @classmethod
+    def get(cls, size):
+        if size not in cls.TABLES:
+            cls.TABLES[size] = BoardTables(size)
+        return cls.TABLES[size]
+
+    @staticmethod
+    def get_directions():
+        return [(dx, dy) for dx in range(-1, 2) for dy in range(-1, 2) if dx != 0 or dy != 0]
+
+    def get_shifts(self):
+        not_left = 0
+        not_right = 0
+        for y in range(self.size):
+            for x in range(self.size):
+                bit = 1 << y * self.size + x
+                if x != 0:
+                    not_left |= bit
+                if x != self.size - 1:
+                    not_right |= bit
+        shifts = []
+        for dx, dy in self.get_directions():
+            mask = self.full
+            if dx == 1:
+                mask &= not_left
+            elif dx == -1:
+                mask &= not_right
+            shifts.append((dy * self.size + dx, mask))
+        return shifts
+
+    def get_rays_neighbours(self):
+        rays = []
+        neighbours = []
+        for index in range(self.size * self.size):
+            x, y = index % self.size, index // self.size
+            square_rays = []
+            square_neighbours = 0
+            for dx, dy in self.get_directions():
+                ray = []
+                ray_x, ray_y = x + dx, y + dy
+                while 0 <= ray_x < self.size and 0 <= ray_y < self.size:
+                    ray.append(1 << ray_y * self.size + ray_x)
+                    ray_x += dx
+                    ray_y += dy
+                if len(ray) > 0:
+                    square_neighbours |= ray[0]
+                if len(ray) > 1:
+                    square_rays.append(tuple(ray))
+            rays.append(tuple(square_rays))
+            neighbours.append(square_neighbours)
+        return tuple(rays), tuple(neighbours)
+
+
+class Bitboard:
+
+    MIN_SIZE = 4
+    MAX_SIZE = 18
+    FRONTIER_SCAN_LIMIT = 16
+
+    def __init__(self, size):
+        if not self.MIN_SIZE <= size <= self.MAX_SIZE or size % 2 != 0:
+            raise ValueError(f'Board size must be even and from {self.MIN_SIZE} to {self.MAX_SIZE}, got {size}')
+        self.__size = size
+        self.__tables = BoardTables.get(size)
+        self.white = 0
+        self.black = 0
+        self.white_count = 0
+        self.black_count = 0
+        self.hash = 0
+        self.frontier = 0
+        self.history = []
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def tables(self):
+        return self.__tables
+
+    @property
+    def full(self):
+        return self.__tables.full
+
+    @property
+    def occupied(self):
+        return self.white | self.black
+
+    @property
+    def empty(self):
+        return ~(self.white | self.black) & self.__tables.full
+
+    def set_starting_position(self):
+        middle = self.__size // 2
+        white = 1 << self.index(middle - 1, middle - 1) | 1 << self.index(middle, middle)
+        black = 1 << self.index(middle, middle - 1) | 1 << self.index(middle - 1, middle)
+        self.set_position(white, black)
+
+    def set_position(self, white, black):
+        self.white = white
+        self.black = black
+        self.white_count = count_bits(white)
+        self.black_count = count_bits(black)
+        self.hash = self.compute_hash()
+        self.frontier = 0
+        for index in iterate_bits(white | black):
+            self.frontier |= self.__tables.neighbours[index]
+        self.frontier &= self.empty
+        self.history = []
+
+    def get_hash(self, is_white):
+        return self.hash ^ self.__tables.side_key if is_white else self.hash
+
+    def get_history_hashes(self):
+        return [entry[3] for entry in self.history] + [self.hash]
+
+    def compute_hash(self):
+        position_hash = 0
+        for index in iterate_bits(self.white):
+            position_hash ^= self.__tables.white_keys[index]
+        for index in iterate_bits(self.black):
+            position_hash ^= self.__tables.black_keys[index]
+        return position_hash
+
+    def index(self, x, y):
+        return y * self.__size + x
+
+    def coordinates(self, index):
+        return index % self.__size, index // self.__size
+
+    def get_own_enemy(self, is_white):
+        return (self.white, self.black) if is_white else (self.black, self.white)
+
+    def get_color(self, index):
+        bit = 1 << index
+        if self.white & bit:
+            return True
+        if self.black & bit:
+            return False
+        return None
+
+    def count(self, is_white):
+        return self.white_count if is_white else self.black_count
+
+    def get_moves(self, is_white):
+        own, enemy = self.get_own_enemy(is_white)
+        if count_bits(self.frontier) <= self.FRONTIER_SCAN_LIMIT:
+            moves = 0
+            for index in iterate_bits(self.frontier):
+                if self.is_legal(index, is_white):
+                    moves |= 1 << index
+            return moves
+        moves = 0
+        for shift, mask in self.__tables.shifts:
+            line = shift_bits(own, shift, mask) & enemy
+            for _ in range(self.__size - 3):
+                line |= shift_bits(line, shift, mask) & enemy
+            moves |= shift_bits(line, shift, mask) & self.frontier
+        return moves
+
+    def is_legal(self, index, is_white):
+        own, enemy = self.get_own_enemy(is_white)
+        for ray in self.__tables.rays[index]:
+            if not enemy & ray[0]:
+                continue
+            for bit in ray:
+                if not enemy & bit:
+                    if own & bit:
+                        return True
+                    break
+        return False
+
+    def get_flips(self, index, is_white):
+        own, enemy = self.get_own_enemy(is_white)
+        flips = 0
+        for ray in self.__tables.rays[index]:
+            line = 0
+            for bit in ray:
+                if not enemy & bit:
+                    if own & bit:
+                        flips |= line
+                    break
+                line |= bit
+        return flips
+
+    def put(self, index, is_white):
+        bit = 1 << index
+        if is_white:
+            self.white |= bit
+            self.white_count += 1
+            self.hash ^= self.__tables.white_keys[index]
+        else:
+            self.black |= bit
+            self.black_count += 1
+            self.hash ^= self.__tables.black_keys[index]
+        self.frontier = (self.frontier | self.__tables.neighbours[index]) & self.empty
+
+    def place(self, index, is_white):
+        flips = self.get_flips(index, is_white)
+        bit = 1 << index
+        previous_hash = self.hash
+        flip_keys = self.__tables.flip_keys
+        flipped_count = 0
+        for flipped in iterate_bits(flips):
+            self.hash ^= flip_keys[flipped]
+            flipped_count += 1
+        self.history.append((index, flips, flipped_count, previous_hash, self.frontier))
+        if is_white:
+            self.white |= bit | flips
+            self.black &= ~flips
+            self.white_count += flipped_count + 1
+            self.black_count -= flipped_count
+            self.hash ^= self.__tables.white_keys[index]
+        else:
+            self.black |= bit | flips
+            self.white &= ~flips
+            self.black_count += flipped_count + 1
+            self.white_count -= flipped_count
+            self.hash ^= self.__tables.black_keys[index]
+        self.frontier = (self.frontier | self.__tables.neighbours[index]) & ~(self.white | self.black)
+        return flips
+
+    def undo(self):
+        index, flips, flipped_count, self.hash, self.frontier = self.history.pop()
+        bit = 1 << index
+        if self.white & bit:
+            self.white &= ~(bit | flips)
+            self.black |= flips
+            self.white_count -= flipped_count + 1
+            self.black_count += flipped_count
+        else:
+            self.black &= ~(bit | flips)
+            self.white |= flips
+            self.black_count -= flipped_count + 1
+            self.white_count += flipped_count
+        return index, flips
+
+    def perft(self, depth, is_white, passed=False):
+        if depth == 0:
+            return 1
+        moves = self.get_moves(is_white)
+        if moves == 0:
+            if passed:
+                return 1
+            return self.perft(depth - 1, not is_white, True)
+        if depth == 1:
+            return count_bits(moves)
+        nodes = 0
+        for move in iterate_bits(moves):
+            self.place(move, is_white)
+            nodes += self.perft(depth - 1, not is_white)
+            self.undo()
+        return nodes
+
+    def copy(self):
+        board = Bitboard.__new__(Bitboard)
+        board.__size = self.__size
+        board.__tables = self.__tables
+        board.white = self.white
+        board.black = self.black
+        board.white_count = self.white_count
+        board.black_count = self.black_count
+        board.hash = self.hash
+        board.frontier = self.frontier
+        board.history = list(self.history)
+        return board
+
+
+def shift_bits(bits, shift, mask):
+    return (bits << shift if shift > 0 else bits >> -shift) & mask
+
+
+def count_bits(bits):
+    return bin(bits).count('1')
+
+
+def iterate_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+
+import time
+from Bitboard import count_bits, iterate_bits
+from Search import SearchTimeout
+from TranspositionTable import TranspositionTable
+
+
+class EndgameSolver:
+
+    THRESHOLDS = {4: 12, 6: 14, 8: 12, 10: 12, 12: 10, 14: 10, 16: 10}
+    TABLE_MEMORY = 2 * 1024 * 1024
+    FASTEST_FIRST_EMPTIES = 7
+    TIME_CHECK_INTERVAL = 1024
+    INFINITY = 1 << 10
+
+    def __init__(self, thresholds=None, table=None):
+        self.thresholds = thresholds if thresholds is not None else self.THRESHOLDS
+        self.table = table if table is not None else TranspositionTable(self.TABLE_MEMORY)
+        self.nodes = 0
+        self.score = 0
+        self.exact = False
+        self.__deadline = None
+        self.__node_limit = None
+        self.__cancel = None
+
+    def get_threshold(self, size):
+        return self.thresholds.get(size, 0)
+
+    def can_solve(self, board):
+        return count_bits(board.empty) <= self.get_threshold(board.size)
+
+    def solve(self, board, is_white, deadline=None, node_limit=None, cancel=None):
+        board = board.copy()
+        self.nodes = 0
+        self.exact = False
+        self.__deadline = deadline
+        self.__node_limit = node_limit
+        self.__cancel = cancel
+        moves = board.get_moves(is_white)
+        if moves == 0:
+            return None
+        empties = count_bits(board.empty)
+        alpha = -self.INFINITY
+        best_move = None
+        try:
+            for move in self.order_moves(board, is_white, moves, empties):
+                board.place(move, is_white)
+                score = -self.negamax(board, not is_white, empties - 1, -self.INFINITY, -alpha, False)
+                board.undo()
+                if score > alpha:
+                    alpha = score
+                    best_move = move
+        except SearchTimeout:
+            return None
+        self.score = alpha
+        self.exact = True
+        return best_move
+
+    def negamax(self, board, is_white, empties, alpha, beta, passed):
+        self.count_node()
+        if empties == 0:
+            return self.get_final_score(board, is_white)
+        key = board.get_hash(is_white)
+        entry = self.table.get(key)
+        table_move = None
+        if entry is not None:
+            _, _, entry_score, entry_bound, table_move = entry
+            if entry_bound == TranspositionTable.EXACT:
+                return entry_score
+            if entry_bound == TranspositionTable.LOWER:
+                alpha = max(alpha, entry_score)
+            else:
+                beta = min(beta, entry_score)
+            if alpha >= beta:
+                return entry_score
+        moves = board.get_moves(is_white)
+        if moves == 0:
+            if passed:
+                return self.get_final_score(board, is_white)
+            return -self.negamax(board, not is_white, empties, -beta, -alpha, True)
+        original_alpha = alpha
+        best_score = -self.INFINITY
+        best_move = None
+        for move in self.order_moves(board, is_white, moves, empties, table_move):
+            board.place(move, is_white)
+            score = -self.negamax(board, not is_white, empties - 1, -beta, -alpha, False)
+            board.undo()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if best_score <= original_alpha:
+            bound = TranspositionTable.UPPER
+        elif best_score >= beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        self.table.store(key, empties, best_score, bound, best_move)
+        return best_score
+
+    def count_node(self):
+        self.nodes += 1
+        if self.__node_limit is not None and self.nodes > self.__node_limit:
+            raise SearchTimeout
+        if self.nodes % self.TIME_CHECK_INTERVAL == 0:
+            if self.__deadline is not None and time.time() > self.__deadline:
+                raise SearchTimeout
+            if self.__cancel is not None and self.__cancel.is_cancelled:
+                raise SearchTimeout
+
+    @staticmethod
+    def get_final_score(board, is_white):
+        difference = board.white_count - board.black_count
+        return difference if is_white else -difference
+
+    @staticmethod
+    def get_regions(board):
+        neighbours = board.tables.neighbours
+        empty = board.empty
+        regions = []
+        while empty:
+            region = empty & -empty
+            frontier = region
+            while frontier:
+                grown = 0
+                for index in iterate_bits(frontier):
+                    grown |= neighbours[index]
+                frontier = grown & empty & ~region
+                region |= frontier
+            empty &= ~region
+            regions.append(region)
+        return regions
+
+    def order_moves(self, board, is_white, moves, empties, first=None):
+        odd = 0
+        for region in self.get_regions(board):
+            if count_bits(region) % 2 == 1:
+                odd |= region
+        corners = board.tables.corners
+        ordered = []
+        for group in (moves & odd & corners, moves & odd & ~corners, moves & ~odd & corners, moves & ~odd & ~corners):
+            if empties >= self.FASTEST_FIRST_EMPTIES and count_bits(group) > 1:
+                ordered += sorted(iterate_bits(group), key=lambda move: self.get_reply_count(board, is_white, move))
+            else:
+                ordered += iterate_bits(group)
+        if first is not None and first in ordered:
+            ordered.remove(first)
+            ordered.insert(0, first)
+        return ordered
+
+    @staticmethod
+    def get_reply_count(board, is_white, move):
+        board.place(move, is_white)
+        replies = count_bits(board.get_moves(not is_white))
+        board.undo()
+        return replies
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+
+
+from Bitboard import BoardTables
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class EvaluationTables:
+
+    CORNER_WEIGHT = 16
+    X_SQUARE_WEIGHT = -8
+    C_SQUARE_WEIGHT = -4
+    EDGE_WEIGHT = 2
+    INNER_WEIGHT = 1
+    TABLES = {}
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+        self.bytes = (self.cells + 7) // 8
+        corners = BoardTables.get(size).corners
+        self.corners = numpy.array([corners >> index & 1 for index in range(self.cells)], dtype=numpy.int32)
+        self.edges = numpy.zeros(self.cells, dtype=numpy.int32)
+        self.square_weights = numpy.zeros(self.cells, dtype=numpy.int32)
+        for index in range(self.cells):
+            self.square_weights[index] = self.get_square_weight(index % size, index // size)
+            self.edges[index] = self.is_edge(index % size) or self.is_edge(index // size)
+        self.edges -= self.corners
+        self.features = numpy.stack([self.square_weights, self.corners, self.edges], axis=1)
+
+    @classmethod
+    def get(cls, size):
+        if size not in cls.TABLES:
+            cls.TABLES[size] = EvaluationTables(size)
+        return cls.TABLES[size]
+
+    def is_edge(self, coordinate):
+        return coordinate == 0 or coordinate == self.size - 1
+
+    def get_square_weight(self, x, y):
+        last = self.size - 1
+        corner_x = min(x, last - x)
+        corner_y = min(y, last - y)
+        if corner_x == 0 and corner_y == 0:
+            return self.CORNER_WEIGHT
+        if corner_x == 1 and corner_y == 1:
+            return self.X_SQUARE_WEIGHT
+        if min(corner_x, corner_y) == 0 and max(corner_x, corner_y) == 1:
+            return self.C_SQUARE_WEIGHT
+        if corner_x == 0 or corner_y == 0:
+            return self.EDGE_WEIGHT
+        return self.INNER_WEIGHT
+
+    def get_planes(self, bitboards):
+        data = b''.join(bits.to_bytes(self.bytes, 'little') for bits in bitboards)
+        planes = numpy.frombuffer(data, dtype=numpy.uint8).reshape(len(bitboards), self.bytes)
+        planes = numpy.unpackbits(planes, axis=1, bitorder='little')[:, :self.cells]
+        return planes.reshape(len(bitboards), self.size, self.size).astype(bool)
+
+
+def shift_planes(planes, dx, dy):
+    shifted = numpy.zeros_like(planes)
+    size = planes.shape[1]
+    target_y = slice(max(dy, 0), size + min(dy, 0))
+    source_y = slice(max(-dy, 0), size + min(-dy, 0))
+    target_x = slice(max(dx, 0), size + min(dx, 0))
+    source_x = slice(max(-dx, 0), size + min(-dx, 0))
+    shifted[:, target_y, target_x] = planes[:, source_y, source_x]
+    return shifted
+
+
+def get_moves_planes(own, enemy, empty):
+    moves = numpy.zeros_like(own)
+    for dx, dy in BoardTables.get_directions():
+        candidates = shift_planes(own, dx, dy) & enemy
+        for _ in range(own.shape[1] - 3):
+            candidates |= shift_planes(candidates, dx, dy) & enemy
+        moves |= shift_planes(candidates, dx, dy) & empty
+    return moves
+
+
+def get_frontier_planes(empty):
+    frontier = numpy.zeros_like(empty)
+    for dx, dy in BoardTables.get_directions():
+        frontier |= shift_planes(empty, dx, dy)
+    return frontier
+
+
+class Evaluator:
+
+    AVAILABLE = numpy is not None
+    FEATURE_WEIGHTS = (1, 8, 1)
+    MOBILITY_WEIGHT = 3
+    FRONTIER_WEIGHT = 2
+
+    def __init__(self, limit=999):
+        self.limit = limit
+
+    def evaluate(self, board, is_white):
+        return int(self.evaluate_batch(board.size, [board.white], [board.black], is_white)[0])
+
+    def evaluate_batch(self, size, whites, blacks, is_white):
+        tables = EvaluationTables.get(size)
+        white = tables.get_planes(whites)
+        black = tables.get_planes(blacks)
+        own, enemy = (white, black) if is_white else (black, white)
+        empty = ~(own | enemy)
+        difference = own.reshape(len(whites), -1).astype(numpy.int32) - enemy.reshape(len(whites), -1)
+        scores = difference @ tables.features @ numpy.array(self.FEATURE_WEIGHTS, dtype=numpy.int32)
+        mobility = get_moves_planes(own, enemy, empty).sum(axis=(1, 2)) - \
+            get_moves_planes(enemy, own, empty).sum(axis=(1, 2))
+        frontier = get_frontier_planes(empty)
+        frontier_discs = (own & frontier).sum(axis=(1, 2)) - (enemy & frontier).sum(axis=(1, 2))
+        scores += self.MOBILITY_WEIGHT * mobility - self.FRONTIER_WEIGHT * frontier_discs
+        return numpy.clip(scores, -self.limit, self.limit)
@@ -1,7 +1,12 @@
-import copy
+from Bitboard import Bitboard, count_bits, iterate_bits
 from Point import Point
 from Units import Cell, Checker
-import time
+from ParallelSearch import ParallelSearch
+from OpeningBook import OpeningBook
+from Endgame import EndgameSolver
+from Ponder import Ponderer
+from SaveFile import SaveFile, SaveError
+from TranspositionTable import TranspositionTable
 
 
 class Game:
@@ -11,24 +16,31 @@ class Game:
     BOT = 'Bot'
     PLAYER = 'Player'
     BOT_DIFFICULTIES = ['Easy', 'Normal', 'Hard']
-    HARD_BOT_DEPTH_INTELLIGENCE = 5
-    HARD_BOT_AMOUNT_INTELLIGENCE = 3
+    HARD_BOT_TIME_LIMIT = 1.0
+    HARD_BOT_NODE_LIMIT = None
+    HARD_BOT_MAX_DEPTH = 64
+    HARD_BOT_TABLE_MEMORY = 16 * 1024 * 1024
+    HARD_BOT_WORKERS = 1
+    HARD_BOT_SOLVE_ENDGAME = True
+    HARD_BOT_PONDER = True
+    USE_OPENING_BOOK = True
 
     def __init__(self, *args):
         if len(args) < 2:
             raise ValueError
         is_new_game = args[0]
+        self.__score = {self.WHITE: 0, self.BLACK: 0}
         if is_new_game:
             if len(args) != 5:
                 raise ValueError
             self.get_new_game_data(args[1], args[2], args[3], args[4])
         else:
             self.get_load_game_data(self.load(args[1]))
-
-        self.__score = {self.WHITE: 0, self.BLACK: 0}
         self.update_score()
 
         self.__bots = [self.easy_bot_turn, self.normal_bot_turn, self.hard_bot_turn]
+        self.__search = None
+        self.__ponderer = None
 
     def get_new_game_data(self, size, bot_active, bot_is_white, bot_difficulty):
         self.__size = size
@@ -40,11 +52,11 @@ class Game:
         self.PLAYER_IS_WHITE = not self.BOT_IS_WHITE
         self.BOT_DIFFICULTY = bot_difficulty
 
-        self.__occupied_coordinates = []
+        self.__board = Bitboard(self.__size)
         self.__game_map = self.get_map()
-
-        self.__colored_checkers = {self.WHITE: [], self.BLACK: []}
-        self.__checkers = self.get_starting_checkers()
+        self.get_starting_checkers()
+        self.__start = (self.__board.white, self.__board.black, self.__white_turn)
+        self.__moves = []
 
     def get_load_game_data(self, load_data):
         self.__bot_active = load_data[0]
@@ -52,49 +64,48 @@ class Game:
         self.BOT_DIFFICULTY = load_data[1]
         self.__size = load_data[2]
 
-        self.__white_turn = load_data[3]
         self.PLAYER_IS_WHITE = load_data[3]
         self.BOT_IS_WHITE = not self.PLAYER_IS_WHITE
 
-        self.__occupied_coordinates = []
+        self.__board = Bitboard(self.__size)
         self.__game_map = self.get_map()
-
-        self.__colored_checkers = {self.WHITE: [], self.BLACK: []}
-        self.__checkers = {}
-        for white_checker in load_data[4]:
-            self.__colored_checkers[self.WHITE].append(white_checker)
-            self.__checkers[white_checker.coordinates.to_tuple()] = white_checker
-            self.__occupied_coordinates.append(white_checker.coordinates)
-        for black_checker in load_data[5]:
-            self.__colored_checkers[self.BLACK].append(black_checker)
-            self.__checkers[black_checker.coordinates.to_tuple()] = black_checker
-            self.__occupied_coordinates.append(black_checker.coordinates)
+        self.set_position(*load_data[6])
+        self.__moves = load_data[7]
+        for move in self.__moves:
+            if move != SaveFile.PASS:
+                if not self.__board.is_legal(move, self.__white_turn):
+                    raise SaveError(f'Illegal move {move} in save')
+                self.__board.place(move, self.__white_turn)
+            self.__white_turn = not self.__white_turn
+        if (self.__board.white, self.__board.black, self.__white_turn) != (load_data[4], load_data[5], load_data[3]):
+            raise SaveError('Moves do not lead to the saved position')
 
     def load(self, data):
-        load_data = []
+        if isinstance(data, bytes):
+            if SaveFile.is_binary(data):
+                return SaveFile.decode(data)
+            data = data.decode().splitlines()
         if data[0] == 'pvp':
-            load_data.append(False)
-            load_data.append(0)
+            bot_active, bot_difficulty = False, 0
         else:
-            load_data.append(True)
-            load_data.append(int(data[0][-1]))
-        load_data.append(int(data[1]))
-        load_data.append(data[2] == self.WHITE)
-        white_checkers = []
+            bot_active, bot_difficulty = True, int(data[0][-1])
+        size = int(data[1])
+        is_white_turn = data[2] == self.WHITE
+        board = Bitboard(size)
+        white = 0
         i = 3
         while len(data[i]) > 0:
-            coordinates = data[i].split(' ')
-            white_checkers.append(Checker(Point(int(coordinates[0]), int(coordinates[1])), True))
+            x, y = data[i].split(' ')
+            white |= 1 << board.index(int(x), int(y))
             i += 1
         i += 1
-        load_data.append(white_checkers)
-        black_checkers = []
+        black = 0
         while i < len(data) and len(data[i]) > 0:
-            coordinates = data[i].split(' ')
-            black_checkers.append(Checker(Point(int(coordinates[0]), int(coordinates[1])), False))
+            x, y = data[i].split(' ')
+            black |= 1 << board.index(int(x), int(y))
             i += 1
-        load_data.append(black_checkers)
-        return load_data
+        SaveFile.check_position(size, white, black)
+        return bot_active, bot_difficulty, size, is_white_turn, white, black, (white, black, is_white_turn), []
 
     @property
     def bot_active(self):
@@ -116,234 +127,198 @@ class Game:
     def game_map(self):
         return self.__game_map
 
+    @property
+    def moves(self):
+        return self.__moves
+
+    @property
+    def search(self):
+        if self.__search is None:
+            from Evaluation import Evaluator
+            self.__search = ParallelSearch(self.HARD_BOT_TIME_LIMIT, self.HARD_BOT_NODE_LIMIT, self.HARD_BOT_MAX_DEPTH,
+                                           TranspositionTable(self.HARD_BOT_TABLE_MEMORY), self.HARD_BOT_WORKERS,
+                                           EndgameSolver() if self.HARD_BOT_SOLVE_ENDGAME else None,
+                                           Evaluator() if Evaluator.AVAILABLE else None)
+            self.__ponderer = Ponderer(self.__search)
+        return self.__search
+
+    @property
+    def board(self):
+        return self.__board
+
     @property
     def checkers(self):
-        return list(self.__checkers.values())
+        return self.get_colored_checkers(True) + self.get_colored_checkers(False)
 
     @property
     def occupied_coordinates(self):
-        return self.__occupied_coordinates
+        return [self.to_point(index) for index in iterate_bits(self.__board.occupied)]
 
     @property
     def is_finished(self):
-        return len(self.__checkers) == len(self.__game_map) or \
-               (len(self.get_possible_turns(True)) == 0 and len(self.get_possible_turns(False)) == 0)
+        return self.__board.empty == 0 or \
+               (self.__board.get_moves(True) == 0 and self.__board.get_moves(False) == 0)
 
     def get_save(self):
-        mode = 'pve' + str(self.BOT_DIFFICULTY) if self.__bot_active else 'pvp'
-        size = str(self.__size)
-        current_turn = self.WHITE if self.__white_turn else self.BLACK
-        white_checkers = ''
-        for checker in self.__colored_checkers[self.WHITE]:
-            coordinates = checker.coordinates
-            white_checkers += '{} {}\n'.format(coordinates.x, coordinates.y)
-        black_checkers = ''
-        for checker in self.__colored_checkers[self.BLACK]:
-            coordinates = checker.coordinates
-            black_checkers += '{} {}\n'.format(coordinates.x, coordinates.y)
-        return '{}\n{}\n{}\n{}\n{}'.format(mode, size, current_turn, white_checkers, black_checkers)
+        return SaveFile.encode(self.__bot_active, self.BOT_DIFFICULTY, self.__size, self.__white_turn,
+                               self.__board.white, self.__board.black, self.__start, self.__moves)
+
+    def get_position_hashes(self):
+        board_hashes = self.__board.get_history_hashes()
+        side_key = self.__board.tables.side_key
+        is_white = self.__start[2]
+        placed = 0
+        hashes = []
+        for move in self.__moves:
+            hashes.append(board_hashes[placed] ^ side_key if is_white else board_hashes[placed])
+            if move != SaveFile.PASS:
+                placed += 1
+            is_white = not is_white
+        hashes.append(board_hashes[placed] ^ side_key if is_white else board_hashes[placed])
+        return hashes
 
     def is_inside_field(self, coordinates):
         return 0 <= coordinates.x < self.__size and 0 <= coordinates.y < self.__size
 
+    def to_index(self, coordinates):
+        return self.__board.index(coordinates.x, coordinates.y)
+
+    def to_point(self, index):
+        x, y = self.__board.coordinates(index)
+        return Point(x, y)
+
+    def is_occupied(self, coordinates):
+        return self.__board.get_color(self.to_index(coordinates)) is not None
+
+    def get_cell(self, coordinates):
+        return self.__game_map[coordinates.x * self.__size + coordinates.y]
+
     def get_map(self):
         return [Cell(Point(x, y)) for x in range(self.__size) for y in range(self.__size)]
 
+    def get_colored_checkers(self, is_white):
+        bits = self.__board.white if is_white else self.__board.black
+        return [Checker(self.to_point(index), is_white) for index in iterate_bits(bits)]
+
+    def set_position(self, white, black, is_white_turn):
+        self.__board.set_position(white, black)
+        self.__white_turn = is_white_turn
+        self.__start = (white, black, is_white_turn)
+        self.__moves = []
+        self.update_score()
+
     def get_starting_checkers(self):
-        middle = self.__size // 2
-        checkers_dict = {}
-        checkers = [Checker(Point(middle - 1, middle - 1), True),
-                    Checker(Point(middle, middle - 1), False),
-                    Checker(Point(middle - 1, middle), False),
-                    Checker(Point(middle, middle), True)]
-        for checker in checkers:
-            checkers_dict[checker.coordinates.to_tuple()] = checker
-            self.__occupied_coordinates.append(checker.coordinates)
-            if checker.is_white:
-                self.__colored_checkers[self.WHITE].append(checker)
-            else:
-                self.__colored_checkers[self.BLACK].append(checker)
-        return checkers_dict
+        self.__board.set_starting_position()
+        return self.checkers
 
     def pass_turn(self):
+        self.__moves.append(SaveFile.PASS)
         self.__white_turn = not self.__white_turn
 
     def make_turn(self, coordinates):
-        self.add_checker(coordinates, self.is_white_turn)
-        self.pass_turn()
+        self.__moves.append(self.to_index(coordinates))
+        self.__place(coordinates, self.is_white_turn)
+        self.__white_turn = not self.__white_turn
 
-    def bot_turn(self):
+    def bot_turn(self, cancel=None, progress=None):
+        if self.__bots[self.BOT_DIFFICULTY] == self.hard_bot_turn:
+            return self.hard_bot_turn(cancel=cancel, progress=progress)
         return self.__bots[self.BOT_DIFFICULTY]()
 
     def easy_bot_turn(self):
-        for cell in self.__game_map:
-            if cell.coordinates not in self.__occupied_coordinates:
-                enemies = self.get_enemies_around(Checker(cell.coordinates, self.BOT_IS_WHITE))
-                if len(enemies) > 0:
-                    self.add_checker(cell.coordinates, self.BOT_IS_WHITE)
-                    self.pass_turn()
-                    return cell.coordinates
-        self.pass_turn()
-        return None
+        moves = self.__board.get_moves(self.is_white_turn)
+        if moves == 0:
+            self.pass_turn()
+            return None
+        turn = self.to_point((moves & -moves).bit_length() - 1)
+        self.make_turn(turn)
+        return turn
 
     def normal_bot_turn(self):
-        max_enemies = []
-        best_position = Point(0, 0)
-        for cell in self.__game_map:
-            if cell.coordinates not in self.__occupied_coordinates:
-                enemies = self.get_enemies_around(Checker(cell.coordinates, self.BOT_IS_WHITE))
-                if len(enemies) >= len(max_enemies):
-                    max_enemies = enemies
-                    best_position = cell.coordinates
-        self.pass_turn()
-        if len(max_enemies) == 0:
+        max_enemies = 0
+        best_index = None
+        for index in iterate_bits(self.__board.frontier):
+            enemies = count_bits(self.__board.get_flips(index, self.is_white_turn))
+            if enemies > 0 and enemies >= max_enemies:
+                max_enemies = enemies
+                best_index = index
+        if best_index is None:
+            self.pass_turn()
             return None
-        self.add_checker(best_position, self.BOT_IS_WHITE)
+        best_position = self.to_point(best_index)
+        self.make_turn(best_position)
         return best_position
 
-    def hard_bot_turn(self):
-        a = time.time()
-        map_copy = self.copy_current_state()
-        best_possible_turns = self.get_best_turns(self.get_possible_turns(), self.HARD_BOT_AMOUNT_INTELLIGENCE)
-        best_variant_score = 0
-        best_turn = None
-        for turn in best_possible_turns:
-            score = self.check_bot_turn(turn)
-            self.use_copy(map_copy)
-            if score >= best_variant_score:
-                best_variant_score = score
-                best_turn = turn
-        if best_turn is not None:
-            self.make_turn(best_turn)
-        else:
+    def hard_bot_turn(self, search=None, cancel=None, progress=None):
+        is_own_search = search is None
+        if is_own_search:
+            search = self.search
+        book = OpeningBook.get(self.__size) if self.USE_OPENING_BOOK else None
+        best_index = book.get_move(self.__board, self.is_white_turn) if book is not None else None
+        if best_index is None and is_own_search:
+            best_index = self.__ponderer.get_move(self.__board, self.is_white_turn)
+        searched_depth = None
+        if best_index is None:
+            best_index = search.get_best_move(self.__board, self.is_white_turn, cancel=cancel, progress=progress)
+            searched_depth = search.depth
+        if best_index is None:
             self.pass_turn()
-        print(time.time() - a)
+            best_turn = None
+        else:
+            best_turn = self.to_point(best_index)
+            self.make_turn(best_turn)
+        is_cancelled = cancel is not None and cancel.is_cancelled
+        if is_own_search and self.HARD_BOT_PONDER and self.__bot_active and not self.is_finished and not is_cancelled:
+            self.__ponderer.start_pondering(self.__board, self.is_white_turn, searched_depth)
         return best_turn
 
-    def is_last_hard_bot_turn(self, turn_number):
-        return turn_number == (self.HARD_BOT_DEPTH_INTELLIGENCE - 1) * 2
-
-    def check_bot_turn(self, turn, turn_number=0):
-        turn_number += 1
-        bot_color = self.WHITE if self.BOT_IS_WHITE else self.BLACK
-        if not self.is_last_hard_bot_turn(turn_number):
-            map_copy = self.copy_current_state()
-            self.make_turn(turn)
-        best_possible_turns = self.get_best_turns(self.get_possible_turns(), self.HARD_BOT_AMOUNT_INTELLIGENCE)
-        if self.is_last_hard_bot_turn(turn_number) or len(best_possible_turns) == 0:
-            return self.__score[bot_color]
-        best_variant_score = 0
-        for turn in best_possible_turns:
-            if self.is_last_hard_bot_turn(turn_number):
-                score = self.get_turn_score(turn)
-            else:
-                score = self.check_bot_turn(turn, turn_number)
-                self.use_copy(map_copy)
-            if score > best_variant_score:
-                best_variant_score = score
-        return best_variant_score
-
-    def copy_current_state(self):
-        return copy.deepcopy([self.__game_map,
-                              self.__score,
-                              self.__occupied_coordinates,
-                              self.__checkers,
-                              self.__colored_checkers,
-                              self.__white_turn])
-
-    def use_copy(self, map_copy):
-        new_copy = copy.deepcopy(map_copy)
-        self.__game_map = new_copy[0]
-        self.__score = new_copy[1]
-        self.__occupied_coordinates = new_copy[2]
-        self.__checkers = new_copy[3]
-        self.__colored_checkers = new_copy[4]
-        self.__white_turn = new_copy[5]
+    def stop_pondering(self):
+        if self.__ponderer is not None:
+            self.__ponderer.stop_pondering()
+
+    def perft(self, depth):
+        return self.__board.copy().perft(depth, self.is_white_turn)
+
+    def undo_turn(self):
+        if self.__moves.pop() != SaveFile.PASS:
+            self.__board.undo()
+            self.update_score()
+        self.__white_turn = not self.__white_turn
 
     def get_possible_turns(self, color=None):
         if color is None:
             color = self.is_white_turn
-        possible_turns = []
-        for cell in self.__game_map:
-            if cell.coordinates not in self.__occupied_coordinates and self.check_turn(cell.coordinates, color):
-                possible_turns.append(cell.coordinates)
-        return possible_turns
+        return [self.to_point(index) for index in iterate_bits(self.__board.get_moves(color))]
 
     def get_turn_score(self, turn):
         color = self.WHITE if self.is_white_turn else self.BLACK
-        return self.score[color] + len(self.get_enemies_around(Checker(turn, self.is_white_turn)))
-
-    def get_best_turns(self, possible_turns, amount):
-        turns = []
-        for turn in possible_turns:
-            score = self.get_turn_score(turn)
-            turns.append((score, turn))
-        if len(turns) <= amount:
-            return [turn[1] for turn in turns]
-        turns.sort(key=lambda x: x[0])
-        return [turns[i][1] for i in range(amount)]
+        return self.score[color] + count_bits(self.__board.get_flips(self.to_index(turn), self.is_white_turn))
 
     def get_enemies_around(self, checker):
-        enemies = []
-        for direction in Point.get_directions():
-            enemies += self.get_enemies(checker, direction)
-        return enemies
+        flips = self.__board.get_flips(self.to_index(checker.coordinates), checker.is_white)
+        return [Checker(self.to_point(index), not checker.is_white) for index in iterate_bits(flips)]
 
     def check_turn(self, turn, color=None):
         if color is None:
             color = self.is_white_turn
-        for direction in Point.get_directions():
-            if self.enemy_in_direction(Checker(turn, color), direction):
-                return True
-        return False
-
-    def enemy_in_direction(self, checker, direction):
-        enemy_coordinates = checker.coordinates + direction
-        enemy = self.get_checker_at(enemy_coordinates)
-        enemies = 0
-        while self.is_inside_field(enemy_coordinates) and enemy is not None and enemy.is_white != checker.is_white:
-            enemy_coordinates += direction
-            enemies += 1
-            enemy = self.get_checker_at(enemy_coordinates)
-        return enemies > 0 and self.is_inside_field(enemy_coordinates) and enemy is not None
+        return self.__board.is_legal(self.to_index(turn), color)
 
     def add_checker(self, coordinates, is_white):
-        color = self.WHITE if is_white else self.BLACK
-        checker = Checker(coordinates, is_white)
-        self.__score[color] += 1
-        self.__occupied_coordinates.append(coordinates)
-        self.__checkers[coordinates.to_tuple()] = checker
-        if is_white:
-            self.__colored_checkers[self.WHITE].append(checker)
-        else:
-            self.__colored_checkers[self.BLACK].append(checker)
-        self.change_enemies_color(checker)
+        self.__board.place(self.to_index(coordinates), is_white)
+        self.set_position(self.__board.white, self.__board.black, self.__white_turn)
+
+    def __place(self, coordinates, is_white):
+        self.__board.place(self.to_index(coordinates), is_white)
+        self.update_score()
 
     def get_checker_at(self, coordinates):
-        key = coordinates.to_tuple()
-        if key in self.__checkers:
-            return self.__checkers[key]
-        return None
-
-    def get_enemies(self, checker, direction):
-        enemies = []
-        enemy_coordinates = checker.coordinates + direction
-        while self.is_inside_field(enemy_coordinates) and self.get_checker_at(enemy_coordinates) is not None \
-                and self.get_checker_at(enemy_coordinates).is_white != checker.is_white:
-            enemies.append(self.get_checker_at(enemy_coordinates))
-            enemy_coordinates += direction
-        return enemies if self.is_inside_field(enemy_coordinates) and \
-                          self.get_checker_at(enemy_coordinates) is not None else []
-
-    def change_enemies_color(self, checker):
-        color = self.WHITE if checker.is_white else self.BLACK
-        enemy_color = self.WHITE if not checker.is_white else self.BLACK
-        for enemy in self.get_enemies_around(checker):
-            self.__colored_checkers[enemy_color].remove(enemy)
-            self.__colored_checkers[color].append(enemy)
-            self.update_score()
-            enemy.change_color()
+        if not self.is_inside_field(coordinates):
+            return None
+        is_white = self.__board.get_color(self.to_index(coordinates))
+        if is_white is None:
+            return None
+        return Checker(coordinates, is_white)
 
     def update_score(self):
-        self.__score[self.WHITE] = len(self.__colored_checkers[self.WHITE])
-        self.__score[self.BLACK] = len(self.__colored_checkers[self.BLACK])
+        self.__score[self.WHITE] = self.__board.white_count
+        self.__score[self.BLACK] = self.__board.black_count
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import sqlite3
+import sys
+import time
+from Game import Game
+
+
+class GameArchive:
+
+    PATH = 'games.db'
+    CACHE_SIZE = 256 * 1024 * 1024
+    MERGE_POSITIONS = 1 << 20
+    HASH_OFFSET = 1 << 63
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY,
+            size INTEGER NOT NULL,
+            black TEXT NOT NULL,
+            white TEXT NOT NULL,
+            black_score INTEGER NOT NULL,
+            white_score INTEGER NOT NULL,
+            winner TEXT NOT NULL,
+            source TEXT NOT NULL,
+            played REAL NOT NULL,
+            record BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS games_by_size ON games (size);
+        CREATE TABLE IF NOT EXISTS positions (
+            hash INTEGER NOT NULL,
+            game INTEGER NOT NULL,
+            ply INTEGER NOT NULL,
+            PRIMARY KEY (hash, game)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS recent_positions (
+            hash INTEGER NOT NULL,
+            game INTEGER NOT NULL,
+            ply INTEGER NOT NULL,
+            PRIMARY KEY (hash, game)
+        ) WITHOUT ROWID;
+    '''
+    POSITIONS_QUERY = '''
+        SELECT {0} FROM positions WHERE hash = :hash
+        UNION ALL
+        SELECT {0} FROM recent_positions WHERE hash = :hash
+    '''
+
+    def __init__(self, path=PATH):
+        self.__connection = sqlite3.connect(path, isolation_level=None)
+        self.__connection.execute('PRAGMA journal_mode = WAL')
+        self.__connection.execute('PRAGMA synchronous = NORMAL')
+        self.__connection.execute(f'PRAGMA cache_size = {-self.CACHE_SIZE // 1024}')
+        self.__connection.executescript(self.SCHEMA)
+        self.__recent = self.__connection.execute('SELECT COUNT(*) FROM recent_positions').fetchone()[0]
+
+    @classmethod
+    def to_key(cls, position_hash):
+        return position_hash - cls.HASH_OFFSET
+
+    @staticmethod
+    def get_entry(game, black, white, source):
+        score = game.score
+        if score[Game.WHITE] == score[Game.BLACK]:
+            winner = 'Draw'
+        else:
+            winner = Game.WHITE if score[Game.WHITE] > score[Game.BLACK] else Game.BLACK
+        return (game.size, black, white, score[Game.BLACK], score[Game.WHITE], winner, source, time.time(),
+                game.get_save(), game.get_position_hashes())
+
+    def add_game(self, entry):
+        return self.add_games([entry])[0]
+
+    def add_games(self, entries):
+        if len(entries) == 0:
+            return []
+        connection = self.__connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            first_id = connection.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM games').fetchone()[0]
+            ids = range(first_id, first_id + len(entries))
+            connection.executemany('INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   ((game_id,) + entry[:-1] for game_id, entry in zip(ids, entries)))
+            positions = [(self.to_key(position_hash), game_id, ply)
+                         for game_id, entry in zip(ids, entries) for ply, position_hash in enumerate(entry[-1])]
+            positions.sort()
+            connection.executemany('INSERT OR IGNORE INTO recent_positions VALUES (?, ?, ?)', positions)
+            recent = self.__recent + len(positions)
+            if recent >= self.MERGE_POSITIONS:
+                self.merge()
+                recent = 0
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        self.__recent = recent
+        return list(ids)
+
+    def merge(self):
+        self.__connection.execute('INSERT OR IGNORE INTO positions SELECT * FROM recent_positions')
+        self.__connection.execute('DELETE FROM recent_positions')
+
+    def find_games(self, position_hash, limit=None):
+        return self.__connection.execute(f'{self.POSITIONS_QUERY.format("game, ply")} ORDER BY game LIMIT :limit',
+                                         {'hash': self.to_key(position_hash),
+                                          'limit': -1 if limit is None else limit}).fetchall()
+
+    def get_results(self, position_hash):
+        rows = self.__connection.execute(f'''
+            SELECT winner, COUNT(*) FROM ({self.POSITIONS_QUERY.format("game")}) AS positions
+            JOIN games ON games.id = positions.game GROUP BY winner''', {'hash': self.to_key(position_hash)})
+        return dict(rows.fetchall())
+
+    def get_game(self, game_id):
+        row = self.__connection.execute('SELECT record FROM games WHERE id = ?', (game_id,)).fetchone()
+        return Game(False, row[0]) if row is not None else None
+
+    def count_games(self):
+        return self.__connection.execute('SELECT COUNT(*) FROM games').fetchone()[0]
+
+    def close(self):
+        self.__connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Look up archived Reversi games that reached a position.')
+    parser.add_argument('save', help='save file with the position to look up')
+    parser.add_argument('--archive', default=GameArchive.PATH)
+    parser.add_argument('--limit', type=int, default=20)
+    arguments = parser.parse_args(argv)
+
+    with open(arguments.save, 'rb') as file:
+        game = Game(False, file.read())
+    archive = GameArchive(arguments.archive)
+    try:
+        position_hash = game.board.get_hash(game.is_white_turn)
+        print(f'{archive.count_games()} games archived, results from this position: {archive.get_results(position_hash)}')
+        for game_id, ply in archive.find_games(position_hash, arguments.limit):
+            print(f'game {game_id} at ply {ply}')
+    finally:
+        archive.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+
+import atexit
+import os
+import queue
+import threading
+from datetime import datetime
+
+
+class LogWriter:
+
+    WRITER = None
+    LOCK = threading.Lock()
+
+    def __init__(self):
+        self.__queue = queue.Queue()
+        self.__thread = threading.Thread(target=self.run, name='LogWriter', daemon=True)
+        self.__thread.start()
+        atexit.register(self.stop)
+
+    @classmethod
+    def get(cls):
+        with cls.LOCK:
+            if cls.WRITER is None:
+                cls.WRITER = LogWriter()
+        return cls.WRITER
+
+    def put(self, log, line):
+        self.__queue.put((log, line))
+
+    def wait(self):
+        self.__queue.join()
+
+    def stop(self):
+        self.__queue.put(None)
+        self.__thread.join()
+
+    def run(self):
+        while True:
+            batch = [self.__queue.get()]
+            while True:
+                try:
+                    batch.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+            is_stopped = self.write_batch(batch)
+            for _ in batch:
+                self.__queue.task_done()
+            if is_stopped:
+                return
+
+    def write_batch(self, batch):
+        touched = []
+        is_stopped = False
+        for record in batch:
+            if record is None:
+                is_stopped = True
+                continue
+            log, line = record
+            try:
+                if line is None:
+                    log.close_file()
+                    continue
+                log.write_line(line)
+                if log not in touched:
+                    touched.append(log)
+            except OSError:
+                pass
+        for log in touched:
+            try:
+                log.flush_file()
+            except OSError:
+                pass
+        return is_stopped
+
+
+class GameLog:
+
+    DIRECTORY = 'logs'
+    MAX_FILES = 100
+    MAX_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, directory=DIRECTORY, max_files=MAX_FILES, max_size=MAX_SIZE):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_size = max_size
+        self.name = os.path.join(directory, datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '.txt')
+        self.__file = None
+        self.__writer = LogWriter.get()
+
+    def write(self, info):
+        self.__writer.put(self, f'{datetime.now().strftime("%X")} {info}\n')
+
+    def close(self):
+        self.__writer.put(self, None)
+
+    def write_line(self, line):
+        if self.__file is None:
+            self.open_file()
+        self.__file.write(line)
+
+    def flush_file(self):
+        if self.__file is not None:
+            self.__file.flush()
+
+    def close_file(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def open_file(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.rotate()
+        self.__file = open(self.name, 'a')
+
+    def rotate(self):
+        logs = [entry for entry in os.scandir(self.directory) if entry.is_file() and entry.path != self.name]
+        logs.sort(key=lambda entry: entry.stat().st_mtime)
+        total_size = sum(entry.stat().st_size for entry in logs)
+        while len(logs) > 0 and (len(logs) >= self.max_files or total_size > self.max_size):
+            oldest = logs.pop(0)
+            total_size -= oldest.stat().st_size
+            os.remove(oldest.path)
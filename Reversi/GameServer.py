@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import itertools
+import sys
+import time
+from functools import partial
+from Bitboard import Bitboard
+from Network import Broadcast, Listener
+from Protocol import Protocol
+
+
+class Match:
+
+    def __init__(self, number, size, black, white):
+        self.number = number
+        self.board = Bitboard(size)
+        self.board.set_starting_position()
+        self.players = (black, white)
+        self.is_white_turn = False
+        self.spectators = Broadcast()
+
+    @property
+    def is_finished(self):
+        return self.board.empty == 0 or \
+               (self.board.get_moves(True) == 0 and self.board.get_moves(False) == 0)
+
+    def get_opponent(self, connection):
+        return self.players[0] if connection is self.players[1] else self.players[1]
+
+    def get_snapshot(self):
+        return Protocol.encode_snapshot(self.board.size, self.is_white_turn, self.board.white, self.board.black)
+
+    def play(self, connection, opcode, value):
+        if connection is not self.players[self.is_white_turn]:
+            return False
+        if opcode != Protocol.PASS:
+            x, y = value
+            if not (0 <= x < self.board.size and 0 <= y < self.board.size):
+                return False
+            index = self.board.index(x, y)
+            if not self.board.is_legal(index, self.is_white_turn):
+                return False
+            self.board.place(index, self.is_white_turn)
+        self.is_white_turn = not self.is_white_turn
+        return True
+
+
+class GameServer:
+
+    PORT = 37001
+
+    def __init__(self, port=PORT, heartbeat_interval=None, timeout=None):
+        self.listener = Listener(port, self.accept, heartbeat_interval, timeout)
+        self.lobby = {}
+        self.matches = {}
+        self.numbered_matches = {}
+        self.spectators = {}
+        self.match_numbers = itertools.count(1)
+        self.finished_matches = 0
+
+    @property
+    def port(self):
+        return self.listener.port
+
+    @property
+    def match_count(self):
+        return len(self.matches) // 2
+
+    def start(self):
+        self.listener.start()
+
+    def close(self):
+        self.listener.close()
+
+    def accept(self, connection):
+        connection.set_handlers(partial(self.receive, connection), partial(self.lose, connection))
+
+    def receive(self, connection, message):
+        opcode, value = message
+        if opcode == Protocol.JOIN:
+            self.join(connection, value)
+        elif opcode in (Protocol.MOVE, Protocol.PASS):
+            self.play(connection, opcode, value)
+        elif opcode == Protocol.SPECTATE:
+            self.spectate(connection, value)
+        else:
+            connection.write(Protocol.encode_reject())
+
+    def is_busy(self, connection):
+        return connection in self.matches or connection in self.spectators or connection in self.lobby.values()
+
+    def join(self, connection, size):
+        if self.is_busy(connection) or not Bitboard.MIN_SIZE <= size <= Bitboard.MAX_SIZE or size % 2 != 0:
+            connection.write(Protocol.encode_reject())
+            return
+        waiting = self.lobby.pop(size, None)
+        if waiting is None:
+            self.lobby[size] = connection
+            return
+        match = Match(next(self.match_numbers), size, waiting, connection)
+        self.matches[waiting] = match
+        self.matches[connection] = match
+        self.numbered_matches[match.number] = match
+        waiting.write(Protocol.encode_hello(size, True, True))
+        connection.write(Protocol.encode_hello(size, False, True))
+
+    def play(self, connection, opcode, value):
+        match = self.matches.get(connection)
+        if match is None or not match.play(connection, opcode, value):
+            connection.write(Protocol.encode_reject())
+            return
+        message = Protocol.encode_pass() if opcode == Protocol.PASS else Protocol.encode_move(*value)
+        match.get_opponent(connection).write(message)
+        match.spectators.publish(message, match.get_snapshot)
+        if match.is_finished:
+            self.end(match)
+
+    def spectate(self, connection, number):
+        if number == 0 and len(self.numbered_matches) != 0:
+            number = max(self.numbered_matches)
+        match = self.numbered_matches.get(number)
+        if match is None or self.is_busy(connection):
+            connection.write(Protocol.encode_reject())
+            return
+        self.spectators[connection] = match
+        match.spectators.subscribe(connection, match.get_snapshot())
+
+    def end(self, match):
+        for player in match.players:
+            self.matches.pop(player, None)
+        for spectator in match.spectators.subscribers:
+            self.spectators.pop(spectator, None)
+        match.spectators.close(match.get_snapshot())
+        self.numbered_matches.pop(match.number, None)
+        self.finished_matches += 1
+
+    def lose(self, connection):
+        for size, waiting in list(self.lobby.items()):
+            if waiting is connection:
+                del self.lobby[size]
+        spectated = self.spectators.pop(connection, None)
+        if spectated is not None:
+            spectated.spectators.unsubscribe(connection)
+        match = self.matches.get(connection)
+        if match is not None:
+            self.end(match)
+            match.get_opponent(connection).close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Host many online Reversi matches with a lobby and matchmaking.')
+    parser.add_argument('--port', type=int, default=GameServer.PORT)
+    arguments = parser.parse_args(argv)
+
+    server = GameServer(arguments.port)
+    server.start()
+    print(f'Listening on port {server.port}')
+    try:
+        while True:
+            time.sleep(60)
+            print(f'{server.match_count} matches, {len(server.spectators)} spectators, {len(server.lobby)} waiting, '
+                  f'{server.finished_matches} finished')
+    except KeyboardInterrupt:
+        server.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
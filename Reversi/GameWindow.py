@@ -1,14 +1,15 @@
+import sqlite3
 from functools import partial
-from PyQt5.QtGui import QIcon, QPainter, QFont, QImage
+from PyQt5.QtGui import QIcon, QPainter, QFont, QPixmap
 from PyQt5.QtWidgets import *
-from PyQt5.QtCore import Qt, QBasicTimer
+from PyQt5.QtCore import Qt, QBasicTimer, QTimer, QRect, pyqtSignal
+from Bitboard import iterate_bits
 from Game import Game
-from Units import Checker
+from Search import CancelToken
 from Point import Point
-from datetime import datetime
-import os
-from TurnThreads import TurnThread, BotThread, OnlineThread
-import copy
+from GameLog import GameLog
+from GameArchive import GameArchive
+from TurnThreads import TurnThread, BotThread
 
 
 class GameWindow(QMainWindow):
@@ -18,6 +19,9 @@ class GameWindow(QMainWindow):
     BOT_SPEED = 1
     FONT = QFont("times", 20)
     TIMER_INTERVAL = 100
+    SPRITES = {}
+
+    refresh_requested = pyqtSignal()
 
     def __init__(self, *args):
         super().__init__()
@@ -34,7 +38,7 @@ class GameWindow(QMainWindow):
             self.is_online = args[5]
             self.socket = args[6]
         else:
-            load_data = args[1].splitlines() if args[2] else self.get_file_content(args[1])
+            load_data = args[1] if args[2] else self.get_file_content(args[1])
             self.__game = Game(args[0], load_data)
             self.is_online = args[2]
             self.socket = args[4]
@@ -43,29 +47,37 @@ class GameWindow(QMainWindow):
         self.is_game_over = False
         self.connection_lost = False
         self.__turn_thread = None
+        self.bot_thread = None
+        self.bot_depth = 0
+        self.highlighted = 0
+        self.__cancel = None
+        self.__display_timer = QTimer(self)
+        self.__display_timer.setSingleShot(True)
+        self.__display_timer.timeout.connect(self.display_bot_turn)
         self.end_game_timer = QBasicTimer()
         self.end_game_timer.start(self.TIMER_INTERVAL, self)
 
         self.WIDTH = (self.__game.size + self.SHIFT) * self.IMAGE_SIZE + self.IMAGE_SIZE * 12
         self.HEIGHT = (self.__game.size + self.SHIFT * 2) * self.IMAGE_SIZE + 20
 
-        self.__log_name = None
+        self.__log = None
         self.start_logging()
 
-        self.checkers = copy.deepcopy(self.__game.checkers)
-        self.turn = self.__game.is_white_turn
-        self.score = copy.deepcopy(self.__game.score)
+        self.copy_game_items()
 
         self.init_ui()
+        self.__shown = self.get_shown_state()
+        self.refresh_requested.connect(self.refresh_board)
         self.show()
 
+        if self.is_online:
+            self.socket.attach(self.receive_online_turn, self.lose_connection)
+
         if self.__game.PLAYER_IS_WHITE and self.__game.bot_active and not self.__game.is_white_turn:
-            self.bot_thread = BotThread(self, self.BOT_SPEED, self.__game)
+            self.bot_thread = BotThread(self, self.__game, self.get_cancel_token())
+            self.connect_bot_signals(self.bot_thread)
             self.bot_thread.start()
-        elif self.is_online and (self.me_first == self.__game.is_white_turn):
-            self.online_thread = OnlineThread(self.__game, self, None, True)
-            self.online_thread.start()
-        else:
+        elif not self.is_online or self.me_first != self.__game.is_white_turn:
             self.highlight_buttons()
 
     def init_ui(self):
@@ -96,21 +108,16 @@ class GameWindow(QMainWindow):
 
     @staticmethod
     def get_file_content(file_name):
-        with open(file_name, 'r') as file:
-            return file.read().splitlines()
+        with open(file_name, 'rb') as file:
+            return file.read()
 
     def copy_game_items(self):
-        self.checkers = copy.deepcopy(self.__game.checkers)
+        self.position = (self.__game.board.white, self.__game.board.black)
         self.turn = self.__game.is_white_turn
-        self.score = copy.deepcopy(self.__game.score)
+        self.score = dict(self.__game.score)
 
     def start_logging(self):
-        if not os.path.exists('logs') or not os.path.isdir('logs'):
-            os.mkdir('logs')
-        logs = os.listdir('logs')
-        if len(logs) == 100:
-            os.remove('logs/' + logs[0])
-        self.__log_name = 'logs/' + datetime.now().strftime('%Y-%m-%d_%H-%M-%S') + '.txt'
+        self.__log = GameLog()
         game_info = 'Player VS '
         difficulty = Game.BOT_DIFFICULTIES[self.__game.BOT_DIFFICULTY]
         game_info += f'{difficulty} Bot' if self.__game.bot_active else 'Player'
@@ -120,7 +127,7 @@ class GameWindow(QMainWindow):
     def get_checker_buttons(self):
         buttons = {}
         for cell in self.__game.game_map:
-            if cell.coordinates not in self.__game.occupied_coordinates:
+            if not self.__game.is_occupied(cell.coordinates):
                 button = QPushButton('', self)
                 coordinates = cell.coordinates.to_image_coordinates(self.IMAGE_SIZE, self.SHIFT)
                 button.setGeometry(coordinates.x, coordinates.y, self.IMAGE_SIZE, self.IMAGE_SIZE)
@@ -152,9 +159,8 @@ class GameWindow(QMainWindow):
         if name == '':
             return False
         full_name = name if len(name) > 3 and name[-5:] == '.save' else name + '.save'
-        with open(full_name, 'w') as file:
-            text = self.__game.get_save()
-            file.write(text)
+        with open(full_name, 'wb') as file:
+            file.write(self.__game.get_save())
         return True
 
     def ask_for_save(self):
@@ -169,36 +175,75 @@ class GameWindow(QMainWindow):
         return success
 
     def highlight_buttons(self):
-        for cell in self.__game.game_map:
-            if self.__game.check_turn(cell.coordinates) and cell.coordinates not in self.__game.occupied_coordinates:
-                cell.highlight()
-                button = self.get_button(cell.coordinates)
-                if button is not None:
-                    button.show()
-        self.update()
+        for turn in self.__game.get_possible_turns():
+            self.highlighted |= 1 << self.__game.to_index(turn)
+            button = self.get_button(turn)
+            if button is not None:
+                button.show()
+        self.refresh_requested.emit()
 
     def hide_buttons(self):
-        for cell in self.__game.game_map:
-            cell.normalize()
-            button = self.get_button(cell.coordinates)
+        for index in iterate_bits(self.highlighted):
+            button = self.get_button(self.__game.to_point(index))
             if button is not None and not button.isHidden():
                 button.hide()
-        self.update()
+        self.highlighted = 0
+        self.refresh_requested.emit()
+
+    def get_shown_state(self):
+        if self.__game.bot_active:
+            white, black = self.position
+            is_white_turn, score = self.turn, self.score
+        else:
+            white, black = self.__game.board.white, self.__game.board.black
+            is_white_turn, score = self.__game.is_white_turn, self.__game.score
+        return white, black, self.highlighted, is_white_turn, tuple(score.values()), self.bot_depth
+
+    def refresh_board(self):
+        state = self.get_shown_state()
+        shown = self.__shown
+        for index in iterate_bits((state[0] ^ shown[0]) | (state[1] ^ shown[1]) | (state[2] ^ shown[2])):
+            self.update(self.get_cell_rect(index))
+        if state[3:] != shown[3:]:
+            for rect in self.get_status_rects():
+                self.update(rect)
+        self.__shown = state
+
+    def get_cell_rect(self, index):
+        image_coordinates = self.__game.to_point(index).to_image_coordinates(self.IMAGE_SIZE, self.SHIFT)
+        return QRect(image_coordinates.x, image_coordinates.y, self.IMAGE_SIZE, self.IMAGE_SIZE)
+
+    def get_status_rects(self):
+        board_right = (self.__game.size + self.SHIFT) * self.IMAGE_SIZE
+        return [QRect(0, 0, self.WIDTH, self.SHIFT * self.IMAGE_SIZE),
+                QRect(board_right, 0, self.WIDTH - board_right, (self.SHIFT + 3) * self.IMAGE_SIZE),
+                QRect(0, self.HEIGHT - self.IMAGE_SIZE - 10, self.WIDTH, self.IMAGE_SIZE + 10)]
 
     def log(self, info):
-        if self.__log_name is None:
-            return
-        with open(self.__log_name, 'a') as log_file:
-            log_file.write(f'{datetime.now().strftime("%X")} {info}\n')
+        if self.__log is not None:
+            self.__log.write(info)
+
+    def stop_logging(self):
+        if self.__log is not None:
+            self.__log.close()
+            self.__log = None
 
     def settings(self):
         if not self.ask_for_save():
             return
+        self.stop_bot()
+        self.stop_logging()
+        self.end_game_timer.stop()
         qApp.exit(GameWindow.EXIT_CODE_CHANGE_MODE)
 
     def restart(self, to_ask):
         if to_ask and not self.ask_for_save():
             return
+        self.stop_bot()
+        self.stop_logging()
+        self.end_game_timer.stop()
+        if self.is_online:
+            self.socket.detach(self.receive_online_turn, self.lose_connection)
         bot_active = self.__game.bot_active
         size = self.__game.size
         player_first = self.__game.BOT_IS_WHITE
@@ -212,8 +257,53 @@ class GameWindow(QMainWindow):
     def quit(self, to_ask):
         if to_ask and not self.ask_for_save():
             return
+        self.stop_bot()
+        self.stop_logging()
+        if self.is_online:
+            self.socket.close()
         qApp.exit()
 
+    def get_cancel_token(self):
+        self.__cancel = CancelToken()
+        return self.__cancel
+
+    def connect_bot_signals(self, thread):
+        thread.progress.connect(self.show_progress)
+        thread.bot_finished.connect(self.show_bot_turn)
+
+    def disconnect_bot_signals(self, thread):
+        thread.progress.disconnect(self.show_progress)
+        thread.bot_finished.disconnect(self.show_bot_turn)
+
+    def show_progress(self, depth, move, score):
+        self.bot_depth = depth
+        self.refresh_board()
+
+    def show_bot_turn(self, thinking_time):
+        delay = max(0.0, self.BOT_SPEED - thinking_time)
+        self.__display_timer.start(int(delay * 1000))
+
+    def display_bot_turn(self):
+        self.bot_depth = 0
+        self.copy_game_items()
+        if self.__game.is_finished:
+            self.is_game_over = True
+        else:
+            self.highlight_buttons()
+        self.refresh_board()
+
+    def stop_bot(self):
+        if self.__cancel is not None:
+            self.__cancel.cancel()
+        for thread in (self.bot_thread, self.__turn_thread):
+            if thread is not None:
+                thread.wait()
+                self.disconnect_bot_signals(thread)
+        self.bot_thread = None
+        self.__turn_thread = None
+        self.__display_timer.stop()
+        self.__game.stop_pondering()
+
     def timerEvent(self, event):
         if self.is_game_over or self.connection_lost:
             self.game_over()
@@ -237,8 +327,24 @@ class GameWindow(QMainWindow):
         else:
             message = 'Draw!' if is_draw else '{} won!'.format(winner)
             self.log('Draw' if is_draw else f'{log_winner} ({log_color}) won')
+            self.archive_game()
         self.create_game_over_window(message)
 
+    def archive_game(self):
+        players = {Game.WHITE: Game.PLAYER, Game.BLACK: Game.PLAYER}
+        if self.__game.bot_active:
+            _, bot = self.get_player_bot_colors()
+            players[bot] = Game.BOT_DIFFICULTIES[self.__game.BOT_DIFFICULTY].lower()
+        entry = GameArchive.get_entry(self.__game, players[Game.BLACK], players[Game.WHITE], 'gui')
+        try:
+            archive = GameArchive()
+            try:
+                archive.add_game(entry)
+            finally:
+                archive.close()
+        except sqlite3.Error:
+            pass
+
     def create_game_over_window(self, message):
         game_over_window = QMessageBox()
         game_over_window.setFont(QFont("times", 12))
@@ -256,7 +362,7 @@ class GameWindow(QMainWindow):
             self.quit(False)
 
     def make_turn(self, button):
-        self.update()
+        self.refresh_board()
         if not self.is_online:
             self.offline_turn(button)
         else:
@@ -265,8 +371,9 @@ class GameWindow(QMainWindow):
             self.game_over()
 
     def offline_turn(self, button):
-        self.__turn_thread = TurnThread(self, self.IMAGE_SIZE, self.SHIFT, self.BOT_SPEED, self.__game,
-                                        self.__pass_button, button)
+        self.__turn_thread = TurnThread(self, self.IMAGE_SIZE, self.SHIFT, self.__game, self.__pass_button, button,
+                                        self.get_cancel_token())
+        self.connect_bot_signals(self.__turn_thread)
         self.__turn_thread.start()
 
     def online_turn(self, button):
@@ -275,8 +382,19 @@ class GameWindow(QMainWindow):
         else:
             coordinates = Point(button.x(), button.y()).to_cell_coordinates(self.IMAGE_SIZE,
                                                                             self.SHIFT)
-        self.__turn_thread = OnlineThread(self.__game, self, coordinates)
-        self.__turn_thread.start()
+        self.socket.make_turn(self.__game, self, coordinates)
+        if self.__game.is_finished:
+            self.is_game_over = True
+        self.refresh_board()
+
+    def receive_online_turn(self, message):
+        self.socket.apply_turn(self.__game, self, message)
+        if self.__game.is_finished:
+            self.is_game_over = True
+        self.refresh_board()
+
+    def lose_connection(self):
+        self.connection_lost = True
 
     def remove_button(self, coordinates):
         coordinates = coordinates.to_tuple()
@@ -302,10 +420,10 @@ class GameWindow(QMainWindow):
         painter = QPainter()
         painter.begin(self)
 
-        self.draw_cells(painter)
+        for rect in event.region().rects():
+            self.draw_board(painter, rect)
         self.draw_signature(painter)
         self.draw_controls(painter)
-        self.draw_checkers(painter)
         self.draw_turn(painter)
         self.draw_score(painter)
         if self.__game.bot_active:
@@ -316,19 +434,18 @@ class GameWindow(QMainWindow):
     def draw_controls(self, painter):
         painter.setFont(self.FONT)
         for button in self.__controls:
-            painter.drawImage(button.x(), button.y(),
-                              QImage(f'images/{button.text()}.png').scaled(self.IMAGE_SIZE, self.IMAGE_SIZE))
-            painter.drawText(button.x() - self.IMAGE_SIZE / 2,
+            painter.drawPixmap(button.x(), button.y(), self.get_sprite(button.text()))
+            painter.drawText(button.x() - self.IMAGE_SIZE // 2,
                              button.y(), self.IMAGE_SIZE * 2, self.IMAGE_SIZE + 30,
                              Qt.AlignCenter | Qt.AlignBottom, button.text())
 
     def draw_bot(self, painter):
         painter.setFont(self.FONT)
         difficulty = self.__game.BOT_DIFFICULTIES[self.__game.BOT_DIFFICULTY]
+        thinking = f' (thinking, depth {self.bot_depth})' if self.bot_depth > 0 else ''
         painter.drawText((self.SHIFT + 1) * self.IMAGE_SIZE + 10, self.HEIGHT - 10,
-                         f'Bot difficulty: {difficulty}')
-        painter.drawImage(self.SHIFT * self.IMAGE_SIZE, self.HEIGHT - self.IMAGE_SIZE - 10,
-                          QImage(f'images/{difficulty}.png').scaled(self.IMAGE_SIZE, self.IMAGE_SIZE))
+                         f'Bot difficulty: {difficulty}{thinking}')
+        painter.drawPixmap(self.SHIFT * self.IMAGE_SIZE, self.HEIGHT - self.IMAGE_SIZE - 10, self.get_sprite(difficulty))
 
     def draw_signature(self, painter):
         painter.drawText(self.WIDTH - 125, self.HEIGHT - 10, 'Made by Artemiy Izakov')
@@ -341,10 +458,8 @@ class GameWindow(QMainWindow):
         painter.drawText(x, y, 'Score:')
         shift = self.IMAGE_SIZE
         y += 3
-        painter.drawImage(x, y,
-                          Checker.WHITE.scaled(self.IMAGE_SIZE, self.IMAGE_SIZE))
-        painter.drawImage(x, y + shift,
-                          Checker.BLACK.scaled(self.IMAGE_SIZE, self.IMAGE_SIZE))
+        painter.drawPixmap(x, y, self.get_checker_sprite(True))
+        painter.drawPixmap(x, y + shift, self.get_checker_sprite(False))
         if not self.__game.bot_active:
             for color, score in score_table.items():
                 painter.drawText(x + self.IMAGE_SIZE, y + shift - 15, '{}: {}'.format(color, score))
@@ -370,20 +485,35 @@ class GameWindow(QMainWindow):
             turn = Game.YOU + "r" if is_white_turn == self.__game.PLAYER_IS_WHITE else Game.BOT + "'s"
         text = fr"{turn} turn"
         painter.drawText((self.SHIFT + 1) * self.IMAGE_SIZE, 35, text)
-        image = Checker.WHITE if is_white_turn else Checker.BLACK
-        painter.drawImage(self.SHIFT * self.IMAGE_SIZE, 0, image.scaled(self.IMAGE_SIZE, self.IMAGE_SIZE))
-
-    def draw_cells(self, painter):
-        for cell in self.__game.game_map:
-            self.draw(cell.image, cell.coordinates, painter)
-
-    def draw_checkers(self, painter):
-        checkers = self.checkers if self.__game.bot_active else self.__game.checkers
-        for checker in checkers:
-            self.draw(checker.image, checker.coordinates, painter)
-
-    def draw(self, image, coordinates, painter):
-        image_coordinates = coordinates.to_image_coordinates(self.IMAGE_SIZE, 1)
-        x = image_coordinates.x
-        y = image_coordinates.y
-        painter.drawImage(x, y, image.scaled(self.IMAGE_SIZE, self.IMAGE_SIZE))
+        painter.drawPixmap(self.SHIFT * self.IMAGE_SIZE, 0, self.get_checker_sprite(is_white_turn))
+
+    def draw_board(self, painter, rect):
+        white, black, highlighted = self.__shown[:3]
+        last = self.__game.size - 1
+        first_x = max(0, rect.left() // self.IMAGE_SIZE - self.SHIFT)
+        last_x = min(last, rect.right() // self.IMAGE_SIZE - self.SHIFT)
+        first_y = max(0, rect.top() // self.IMAGE_SIZE - self.SHIFT)
+        last_y = min(last, rect.bottom() // self.IMAGE_SIZE - self.SHIFT)
+        for x in range(first_x, last_x + 1):
+            for y in range(first_y, last_y + 1):
+                coordinates = Point(x, y)
+                bit = 1 << self.__game.to_index(coordinates)
+                self.draw(self.get_cell_sprite(highlighted & bit), coordinates, painter)
+                if (white | black) & bit:
+                    self.draw(self.get_checker_sprite(white & bit), coordinates, painter)
+
+    def get_sprite(self, name):
+        key = (name, self.IMAGE_SIZE)
+        if key not in self.SPRITES:
+            self.SPRITES[key] = QPixmap(f'images/{name}.png').scaled(self.IMAGE_SIZE, self.IMAGE_SIZE)
+        return self.SPRITES[key]
+
+    def get_cell_sprite(self, is_highlighted):
+        return self.get_sprite('highlightedCell' if is_highlighted else 'cell')
+
+    def get_checker_sprite(self, is_white):
+        return self.get_sprite('whiteChecker' if is_white else 'blackChecker')
+
+    def draw(self, sprite, coordinates, painter):
+        image_coordinates = coordinates.to_image_coordinates(self.IMAGE_SIZE, self.SHIFT)
+        painter.drawPixmap(image_coordinates.x, image_coordinates.y, sprite)
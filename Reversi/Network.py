@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+
+import asyncio
+import concurrent.futures
+import threading
+from Protocol import Protocol, ProtocolError, Decoder
+
+
+class EventLoop:
+
+    LOOP = None
+    LOCK = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        with cls.LOCK:
+            if cls.LOOP is None:
+                cls.LOOP = asyncio.new_event_loop()
+                thread = threading.Thread(target=cls.LOOP.run_forever, name='EventLoop', daemon=True)
+                thread.start()
+        return cls.LOOP
+
+    @classmethod
+    def submit(cls, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, cls.get())
+
+    @classmethod
+    def call(cls, callback, *args):
+        cls.get().call_soon_threadsafe(callback, *args)
+
+
+class Connection:
+
+    READ_SIZE = 4096
+    HEARTBEAT_INTERVAL = 1.0
+    TIMEOUT = 5.0
+
+    def __init__(self, reader, writer, heartbeat_interval=None, timeout=None):
+        self.__reader = reader
+        self.__writer = writer
+        self.__decoder = Decoder()
+        self.heartbeat_interval = heartbeat_interval if heartbeat_interval is not None else self.HEARTBEAT_INTERVAL
+        self.timeout = timeout if timeout is not None else self.TIMEOUT
+        self.__on_message = None
+        self.__on_lost = None
+        self.__pending = []
+        self.__tasks = []
+        self.is_open = True
+        self.is_lost = False
+
+    @classmethod
+    async def open(cls, host, port, heartbeat_interval=None, timeout=None):
+        reader, writer = await asyncio.open_connection(host, port)
+        connection = Connection(reader, writer, heartbeat_interval, timeout)
+        connection.start()
+        return connection
+
+    @classmethod
+    def connect(cls, host, port, connect_timeout=1.0, heartbeat_interval=None, timeout=None):
+        future = EventLoop.submit(asyncio.wait_for(cls.open(host, port, heartbeat_interval, timeout), connect_timeout))
+        try:
+            return future.result()
+        except (asyncio.TimeoutError, concurrent.futures.TimeoutError):
+            raise TimeoutError
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self.__tasks = [loop.create_task(self.read_messages()), loop.create_task(self.send_heartbeats())]
+
+    def set_handlers(self, on_message, on_lost=None):
+        EventLoop.call(self.__set_handlers, on_message, on_lost)
+
+    def __set_handlers(self, on_message, on_lost):
+        self.__on_message = on_message
+        self.__on_lost = on_lost
+        pending, self.__pending = self.__pending, []
+        for message in pending:
+            self.receive(message)
+        if self.is_lost and on_lost is not None:
+            on_lost()
+
+    def receive_one(self, timeout=None):
+        future = concurrent.futures.Future()
+        EventLoop.call(self.__receive_one, future)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError
+
+    def __receive_one(self, future):
+        on_lost = self.__on_lost
+
+        def on_message(message):
+            self.__on_message = None
+            self.__on_lost = on_lost
+            if not future.done():
+                future.set_result(message)
+
+        def on_connection_lost():
+            self.__on_lost = on_lost
+            if not future.done():
+                future.set_exception(ConnectionError('Connection lost'))
+            if on_lost is not None:
+                on_lost()
+        self.__set_handlers(on_message, on_connection_lost)
+
+    async def read_messages(self):
+        try:
+            while True:
+                data = await asyncio.wait_for(self.__reader.read(self.READ_SIZE), self.timeout)
+                if len(data) == 0:
+                    break
+                try:
+                    messages = self.__decoder.feed(data)
+                except ProtocolError as error:
+                    self.receive_all(error.messages)
+                    break
+                self.receive_all(messages)
+        except (asyncio.TimeoutError, OSError):
+            pass
+        self.lose()
+
+    def receive_all(self, messages):
+        for message in messages:
+            if message[0] != Protocol.HEARTBEAT:
+                self.receive(message)
+
+    async def send_heartbeats(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self.write(Protocol.encode_heartbeat())
+
+    def receive(self, message):
+        if self.__on_message is None:
+            self.__pending.append(message)
+        else:
+            self.__on_message(message)
+
+    def write(self, data):
+        if not self.is_open:
+            return
+        if self.__writer.is_closing():
+            self.lose()
+            return
+        self.__writer.write(data)
+
+    def send(self, data):
+        EventLoop.call(self.write, data)
+
+    @property
+    def write_buffer_size(self):
+        return self.__writer.transport.get_write_buffer_size()
+
+    def lose(self):
+        if not self.is_open:
+            return
+        self.is_lost = True
+        self.shut()
+        if self.__on_lost is not None:
+            self.__on_lost()
+
+    def shut(self):
+        self.is_open = False
+        current = asyncio.current_task()
+        for task in self.__tasks:
+            if task is not current:
+                task.cancel()
+        self.__writer.close()
+
+    def close(self):
+        EventLoop.call(self.__close)
+
+    def __close(self):
+        if self.is_open:
+            self.shut()
+
+
+class Broadcast:
+
+    BUFFER_LIMIT = 1 << 16
+
+    def __init__(self, buffer_limit=None):
+        self.buffer_limit = buffer_limit if buffer_limit is not None else self.BUFFER_LIMIT
+        self.subscribers = {}
+
+    def subscribe(self, connection, snapshot):
+        self.subscribers[connection] = False
+        connection.write(snapshot)
+
+    def unsubscribe(self, connection):
+        self.subscribers.pop(connection, None)
+
+    def publish(self, message, get_snapshot):
+        snapshot = None
+        for connection, is_lagging in list(self.subscribers.items()):
+            if not connection.is_open:
+                del self.subscribers[connection]
+            elif connection.write_buffer_size > self.buffer_limit:
+                self.subscribers[connection] = True
+            elif is_lagging:
+                if snapshot is None:
+                    snapshot = get_snapshot()
+                connection.write(snapshot)
+                self.subscribers[connection] = False
+            else:
+                connection.write(message)
+
+    def close(self, snapshot=None):
+        for connection, is_lagging in self.subscribers.items():
+            if is_lagging and snapshot is not None:
+                connection.write(snapshot)
+            connection.close()
+        self.subscribers = {}
+
+
+class Listener:
+
+    HOST = '0.0.0.0'
+
+    def __init__(self, port, on_connection, heartbeat_interval=None, timeout=None):
+        self.port = port
+        self.__on_connection = on_connection
+        self.__heartbeat_interval = heartbeat_interval
+        self.__timeout = timeout
+        self.__server = None
+
+    async def open(self):
+        self.__server = await asyncio.start_server(self.accept, self.HOST, self.port)
+        if self.port == 0:
+            self.port = self.__server.sockets[0].getsockname()[1]
+
+    def start(self):
+        EventLoop.submit(self.open()).result()
+
+    async def accept(self, reader, writer):
+        connection = Connection(reader, writer, self.__heartbeat_interval, self.__timeout)
+        connection.start()
+        self.__on_connection(connection)
+
+    def close(self):
+        if self.__server is not None:
+            EventLoop.call(self.__server.close)
+            self.__server = None
@@ -3,53 +3,98 @@
 
 import socket
 import ipaddress
-import re
+import threading
 from Game import Game
 from Point import Point
-from PyQt5.QtCore import QThread
+from Network import Connection, Listener
+from Protocol import Protocol, ProtocolError
+from PyQt5.QtCore import QObject, pyqtSignal
 
 
-class OnlineMode:
+class OnlineMode(QObject):
 
-    @staticmethod
-    def make_turn(online_socket, game, game_window, turn):
-        try:
-            color = Game.WHITE if game.is_white_turn else Game.BLACK
-            if turn is None:
-                message = 'pass'
-                game_window.log(f"Player's turn\t({color}): passed")
-                game.pass_turn()
-            else:
-                message = str(turn)
-                game_window.log(f"Player's turn\t({color}): placed checker at {turn}")
-                game.make_turn(turn)
-                game_window.remove_button(turn)
-            online_socket.client_socket.send(bytes(message, Server.ENCODING))
-            game_window.hide_buttons()
-        except ConnectionError:
+    turn_received = pyqtSignal(object)
+    connection_lost = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.connection = None
+
+    def attach(self, on_turn, on_lost):
+        self.turn_received.connect(on_turn)
+        self.connection_lost.connect(on_lost)
+        self.connection.set_handlers(self.turn_received.emit, self.connection_lost.emit)
+
+    def detach(self, on_turn, on_lost):
+        self.connection.set_handlers(None)
+        self.turn_received.disconnect(on_turn)
+        self.connection_lost.disconnect(on_lost)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def make_turn(self, game, game_window, turn=None):
+        if not self.connection.is_open:
             game_window.connection_lost = True
+            return
+        color = Game.WHITE if game.is_white_turn else Game.BLACK
+        if turn is None:
+            message = Protocol.encode_pass()
+            game_window.log(f"Player's turn\t({color}): passed")
+            game.pass_turn()
+        else:
+            message = Protocol.encode_move(turn.x, turn.y)
+            game_window.log(f"Player's turn\t({color}): placed checker at {turn}")
+            game.make_turn(turn)
+            game_window.remove_button(turn)
+        self.connection.send(message)
+        game_window.hide_buttons()
+
+    def apply_turn(self, game, game_window, message):
+        opcode, value = message
+        color = Game.WHITE if game.is_white_turn else Game.BLACK
+        if opcode in (Protocol.MOVE, Protocol.PASS) and game_window.me_first != game.is_white_turn:
+            self.drop(game_window, 'turn received out of turn')
+            return
+        if opcode == Protocol.PASS:
+            game_window.log(f"Player's turn\t({color}): passed")
+            game.pass_turn()
+        elif opcode == Protocol.MOVE:
+            turn = Point(*value)
+            if not game.is_inside_field(turn) or not game.check_turn(turn):
+                self.drop(game_window, f'illegal turn at {turn}')
+                return
+            game_window.log(f"Player's turn\t({color}): placed checker at {turn}")
+            game.make_turn(turn)
+            game_window.remove_button(turn)
+        elif opcode == Protocol.REJECT:
+            self.drop(game_window, 'turn rejected')
+            return
+        else:
+            return
+        game_window.highlight_buttons()
+
+    def drop(self, game_window, reason):
+        game_window.log(f'Protocol error: {reason}')
+        self.connection.close()
+        game_window.connection_lost = True
 
     @staticmethod
-    def wait_for_turn(online_socket, game, game_window):
-        try:
-            color = Game.WHITE if game.is_white_turn else Game.BLACK
-            answer = online_socket.client_socket.recv(1024).decode()
-            if answer == 'pass':
-                game_window.log(f"Player's turn\t({color}): passed")
-                game.pass_turn()
-            else:
-                turn = Point.from_string(answer)
-                game_window.log(f"Player's turn\t({color}): placed checker at {turn}")
-                game.make_turn(turn)
-                game_window.remove_button(turn)
-            game_window.highlight_buttons()
-        except ConnectionError:
-            game_window.connection_lost = True
+    def get_snapshot(load_data):
+        game = Game(False, load_data)
+        return Protocol.encode_snapshot(game.size, game.is_white_turn, game.board.white, game.board.black)
+
+    @staticmethod
+    def get_snapshot_save(snapshot):
+        size, is_white_turn, white, black = snapshot
+        game = Game(True, size, False, False, 0)
+        game.set_position(white, black, is_white_turn)
+        return game.get_save()
 
 
-class Server(QThread):
+class Server(OnlineMode):
     PORT = 37001
-    ENCODING = 'utf-8'
 
     def __init__(self, board_size, me_first, is_new, load_data):
         super().__init__()
@@ -61,45 +106,73 @@ class Server(QThread):
         self.load_data = load_data
 
         self.ip = socket.gethostbyname(socket.getfqdn())
-        self.server_socket = socket.socket()
-        self.server_socket.bind(('', self.PORT))
-        self.server_socket.listen(1)
-
-    def run(self):
-        self.client_socket, self.client_address = self.server_socket.accept()
-        message = f'{self.board_size}, {int(not self.me_first)}, {int(self.is_new)}, [{self.load_data}]'
-        self.client_socket.send(bytes(message, self.ENCODING))
+        self.listener = Listener(self.PORT, self.accept)
+
+    def start(self):
+        self.listener.start()
+
+    def accept(self, connection):
+        if self.connection is not None:
+            connection.close()
+            return
+        self.listener.close()
+        self.connection = connection
+        connection.send(Protocol.encode_hello(self.board_size, not self.me_first, self.is_new))
+        if not self.is_new:
+            connection.send(self.get_snapshot(self.load_data))
         self.is_connected = True
 
-    def make_turn(self, game, game_window, turn=None):
-        OnlineMode.make_turn(self, game, game_window, turn)
-
-    def wait_for_turn(self, game, game_window):
-        OnlineMode.wait_for_turn(self, game, game_window)
-
 
-class Client:
+class Client(OnlineMode):
 
-    INFO_PARSER = re.compile(r'(?P<board_size>\d+), (?P<me_first>\d), (?P<is_new>\d), \[(?P<load_data>.*)\]', re.DOTALL)
+    CONNECT_TIMEOUT = 1
+    LOBBY_TIMEOUT = 60
 
-    def __init__(self, server_ip):
+    def __init__(self, server_ip, port=Server.PORT):
+        super().__init__()
         self.server_ip = server_ip
-        self.client_socket = socket.socket()
+        self.port = port
+        self.is_connected = False
+        self.is_failed = False
+
+    @classmethod
+    def from_address(cls, address):
+        if address.count(':') == 1:
+            host, port = address.split(':')
+            if port.isdigit() and int(port) <= 0xFFFF:
+                return cls(host, int(port))
+        return cls(address)
+
+    def start(self, board_size=None):
+        threading.Thread(target=self.join, args=(board_size,), name='Client', daemon=True).start()
+
+    def join(self, board_size):
+        if self.connect_to_server(board_size):
+            self.is_connected = True
+        else:
+            self.is_failed = True
 
-    def connect_to_server(self):
+    def connect_to_server(self, board_size=None):
         if not self.check_ip():
             return False
         try:
-            self.client_socket.settimeout(1)
-            self.client_socket.connect((self.server_ip, Server.PORT))
-            self.client_socket.settimeout(None)
-            game_info = self.client_socket.recv(1024)
-            info = self.INFO_PARSER.search(game_info.decode())
-            self.board_size = int(info['board_size'])
-            self.me_first = bool(int(info['me_first']))
-            self.is_new = bool(int(info['is_new']))
-            self.load_data = info['load_data']
-        except (TimeoutError, OSError):
+            self.connection = Connection.connect(self.server_ip, self.port, self.CONNECT_TIMEOUT)
+            timeout = self.connection.timeout
+            if board_size is not None:
+                self.connection.send(Protocol.encode_join(board_size))
+                timeout = self.LOBBY_TIMEOUT
+            opcode, game_info = self.connection.receive_one(timeout)
+            if opcode != Protocol.HELLO:
+                raise ProtocolError(f'Expected a handshake, got opcode {opcode}')
+            self.board_size, self.me_first, self.is_new = game_info
+            self.load_data = b''
+            if not self.is_new:
+                opcode, snapshot = self.connection.receive_one(self.connection.timeout)
+                if opcode != Protocol.SNAPSHOT:
+                    raise ProtocolError(f'Expected a snapshot, got opcode {opcode}')
+                self.load_data = self.get_snapshot_save(snapshot)
+        except (TimeoutError, OSError, ProtocolError):
+            self.close()
             return False
         else:
             return True
@@ -111,9 +184,3 @@ class Client:
             return False
         else:
             return True
-
-    def make_turn(self, game, game_window, turn=None):
-        OnlineMode.make_turn(self, game, game_window, turn)
-
-    def wait_for_turn(self, game, game_window):
-        OnlineMode.wait_for_turn(self, game, game_window)
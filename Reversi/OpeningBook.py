@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from Bitboard import Bitboard, BoardTables, iterate_bits
+from Search import Search
+from TranspositionTable import TranspositionTable
+
+
+SYMMETRIES = {}
+
+
+def get_symmetries(size):
+    if size not in SYMMETRIES:
+        last = size - 1
+        transforms = [lambda x, y: (x, y), lambda x, y: (last - x, y),
+                      lambda x, y: (x, last - y), lambda x, y: (last - x, last - y),
+                      lambda x, y: (y, x), lambda x, y: (last - y, x),
+                      lambda x, y: (y, last - x), lambda x, y: (last - y, last - x)]
+        symmetries = []
+        for transform in transforms:
+            permutation = [0] * (size * size)
+            for index in range(size * size):
+                x, y = transform(index % size, index // size)
+                permutation[index] = y * size + x
+            inverse = [0] * (size * size)
+            for index, target in enumerate(permutation):
+                inverse[target] = index
+            symmetries.append((tuple(permutation), tuple(inverse)))
+        SYMMETRIES[size] = symmetries
+    return SYMMETRIES[size]
+
+
+def get_canonical(board, is_white):
+    tables = BoardTables.get(board.size)
+    white = list(iterate_bits(board.white))
+    black = list(iterate_bits(board.black))
+    best_key = None
+    best_symmetry = None
+    for symmetry in get_symmetries(board.size):
+        permutation = symmetry[0]
+        key = tables.side_key if is_white else 0
+        for index in white:
+            key ^= tables.white_keys[permutation[index]]
+        for index in black:
+            key ^= tables.black_keys[permutation[index]]
+        if best_key is None or key < best_key:
+            best_key = key
+            best_symmetry = symmetry
+    return best_key, best_symmetry
+
+
+class OpeningBook:
+
+    MAGIC = b'RVBK'
+    VERSION = 1
+    HEADER = struct.Struct('<4sBBHI')
+    RECORD = struct.Struct('<QBBi')
+    FOLDER = 'books'
+    BOOKS = {}
+
+    def __init__(self, path):
+        self.__file = open(path, 'rb')
+        try:
+            self.__data = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.__file.close()
+            raise
+        magic, version, self.__size, _, self.__count = self.HEADER.unpack_from(self.__data, 0)
+        if magic != self.MAGIC or version != self.VERSION or \
+                len(self.__data) != self.HEADER.size + self.__count * self.RECORD.size:
+            self.close()
+            raise ValueError(f'Not a valid opening book: {path}')
+
+    @property
+    def size(self):
+        return self.__size
+
+    def __len__(self):
+        return self.__count
+
+    @classmethod
+    def get_path(cls, size):
+        return os.path.join(cls.FOLDER, f'{size}x{size}.book')
+
+    @classmethod
+    def get(cls, size):
+        if size not in cls.BOOKS:
+            path = cls.get_path(size)
+            cls.BOOKS[size] = OpeningBook(path) if os.path.isfile(path) else None
+        return cls.BOOKS[size]
+
+    def get_record(self, position):
+        return self.RECORD.unpack_from(self.__data, self.HEADER.size + position * self.RECORD.size)
+
+    def find(self, key):
+        low = 0
+        high = self.__count
+        while low < high:
+            middle = (low + high) // 2
+            record = self.get_record(middle)
+            if record[0] < key:
+                low = middle + 1
+            elif record[0] > key:
+                high = middle
+            else:
+                return record[1:]
+        return None
+
+    def get_move(self, board, is_white):
+        if board.size != self.__size:
+            return None
+        key, symmetry = get_canonical(board, is_white)
+        record = self.find(key)
+        if record is None:
+            return None
+        move = symmetry[1][record[0]]
+        if not board.is_legal(move, is_white) or board.get_color(move) is not None:
+            return None
+        return move
+
+    def get_entries(self):
+        entries = {}
+        for position in range(self.__count):
+            key, move, depth, score = self.get_record(position)
+            entries[key] = (move, depth, score)
+        return entries
+
+    def close(self):
+        self.__data.close()
+        self.__file.close()
+
+    @classmethod
+    def write(cls, path, size, entries):
+        folder = os.path.dirname(path)
+        if folder != '' and not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(path, 'wb') as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, size, 0, len(entries)))
+            for key in sorted(entries):
+                move, depth, score = entries[key]
+                file.write(cls.RECORD.pack(key, move, depth, score))
+
+
+class BookBuilder:
+
+    def __init__(self, size, search, entries=None):
+        self.size = size
+        self.search = search
+        self.entries = entries if entries is not None else {}
+
+    def get_positions(self, plies):
+        board = Bitboard(self.size)
+        board.set_starting_position()
+        positions = {}
+        self.collect_positions(board, False, plies, positions)
+        return positions
+
+    def collect_positions(self, board, is_white, plies, positions):
+        moves = board.get_moves(is_white)
+        if moves == 0:
+            return
+        key, symmetry = get_canonical(board, is_white)
+        if key in positions:
+            return
+        positions[key] = (board.copy(), is_white, symmetry)
+        if plies == 0:
+            return
+        for move in iterate_bits(moves):
+            board.place(move, is_white)
+            self.collect_positions(board, not is_white, plies - 1, positions)
+            board.undo()
+
+    def add_position(self, key, board, is_white, symmetry):
+        move = self.search.get_best_move(board, is_white)
+        if move is None:
+            return False
+        old_entry = self.entries.get(key)
+        if old_entry is not None and old_entry[1] > self.search.depth:
+            return False
+        score = max(-(1 << 31), min((1 << 31) - 1, self.search.score))
+        self.entries[key] = (symmetry[0][move], min(self.search.depth, 255), score)
+        return True
+
+    def build(self, plies, log=None):
+        positions = self.get_positions(plies)
+        for number, (key, (board, is_white, symmetry)) in enumerate(positions.items()):
+            self.add_position(key, board, is_white, symmetry)
+            if log is not None:
+                log(f'{number + 1}/{len(positions)} positions, depth {self.search.depth}')
+        return self.entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or extend a Reversi opening book with deep searches.')
+    parser.add_argument('--size', type=int, default=8, choices=range(4, 17, 2))
+    parser.add_argument('--plies', type=int, default=4, help='book every position up to this many moves in')
+    parser.add_argument('--time', type=float, default=1.0, help='search time per position in seconds')
+    parser.add_argument('--depth', type=int, default=64, help='search depth limit')
+    parser.add_argument('--output', default=None, help=f'book file (default: {OpeningBook.FOLDER}/<size>x<size>.book)')
+    parser.add_argument('--extend', action='store_true', help='keep existing entries unless searched deeper')
+    arguments = parser.parse_args(argv)
+
+    path = arguments.output if arguments.output is not None else OpeningBook.get_path(arguments.size)
+    entries = {}
+    if arguments.extend and os.path.isfile(path):
+        book = OpeningBook(path)
+        if book.size != arguments.size:
+            parser.error(f'{path} is a {book.size}x{book.size} book')
+        entries = book.get_entries()
+        book.close()
+    search = Search(arguments.time, None, arguments.depth, TranspositionTable())
+    builder = BookBuilder(arguments.size, search, entries)
+    builder.build(arguments.plies, lambda line: print(line, file=sys.stderr))
+    OpeningBook.write(path, arguments.size, builder.entries)
+    print(f'{len(builder.entries)} positions written to {path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+
+import multiprocessing
+import os
+from Bitboard import Bitboard, count_bits
+from Search import Search, SearchTimeout
+from TranspositionTable import TranspositionTable
+
+
+worker_search = None
+worker_alpha = None
+
+
+def init_worker(shared_alpha, table_memory, evaluator):
+    global worker_search, worker_alpha
+    worker_alpha = shared_alpha
+    worker_search = Search(None, None, table=TranspositionTable(table_memory), evaluator=evaluator)
+
+
+def search_root_move(task):
+    size, white, black, is_white, move, depth, deadline, node_limit = task
+    board = Bitboard(size)
+    board.set_position(white, black)
+    worker_search.node_limit = node_limit
+    worker_search.start(deadline)
+    alpha = worker_alpha.value
+    try:
+        score = worker_search.search_move(board, is_white, move, depth, alpha)
+    except SearchTimeout:
+        return move, None, False, worker_search.nodes, True
+    with worker_alpha.get_lock():
+        if score > worker_alpha.value:
+            worker_alpha.value = score
+    return move, score, score > alpha, worker_search.nodes, worker_search.depth_limited
+
+
+class ParallelSearch(Search):
+
+    CANCEL_CHECK_INTERVAL = 0.05
+
+    def __init__(self, time_limit=1.0, node_limit=None, max_depth=64, table=None, workers=None, endgame=None,
+                 evaluator=None):
+        super().__init__(time_limit, node_limit, max_depth, table, endgame, evaluator)
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.__pool = None
+        self.__alpha = None
+
+    def get_pool(self):
+        if self.__pool is None:
+            context = multiprocessing.get_context('spawn')
+            self.__alpha = context.Value('q', -self.INFINITY)
+            table_memory = self.table.memory_limit // self.workers
+            self.__pool = context.Pool(self.workers, init_worker, (self.__alpha, table_memory, self.evaluator))
+        return self.__pool
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.terminate()
+            self.__pool.join()
+            self.__pool = None
+
+    def wait(self, result, cancel):
+        while not result.ready():
+            result.wait(self.CANCEL_CHECK_INTERVAL)
+            if cancel is not None and cancel.is_cancelled and not result.ready():
+                self.close()
+                return None
+        return result.get()
+
+    def get_best_move(self, board, is_white, deadline=None, cancel=None, progress=None):
+        if self.workers <= 1:
+            return super().get_best_move(board, is_white, deadline, cancel, progress)
+        moves = self.order_moves(board, board.get_moves(is_white))
+        self.depth = 0
+        self.score = 0
+        self.solved = False
+        if len(moves) == 0:
+            return None
+        deadline = deadline if deadline is not None else self.get_deadline()
+        self.start(deadline, cancel)
+        solved_move = self.solve_endgame(board, is_white)
+        if solved_move is not None:
+            if progress is not None:
+                progress(self.depth, solved_move, self.score)
+            return solved_move
+        pool = self.get_pool()
+        best_move = moves[0]
+        empties = count_bits(board.empty)
+        for depth in range(1, self.max_depth + 1):
+            self.__alpha.value = -self.INFINITY
+            tasks = [(board.size, board.white, board.black, is_white, move, depth, deadline, self.node_limit)
+                     for move in moves]
+            first = self.wait(pool.apply_async(search_root_move, (tasks[0],)), cancel)
+            if first is None:
+                break
+            results = [first]
+            if first[1] is not None:
+                others = self.wait(pool.map_async(search_root_move, tasks[1:]), cancel)
+                if others is None:
+                    break
+                results += others
+            self.nodes += sum(result[3] for result in results)
+            if any(result[1] is None for result in results):
+                break
+            exact = [result for result in results if result[2]]
+            move, score = max(exact, key=lambda result: result[1])[:2]
+            best_move = move
+            self.depth = depth
+            self.score = score
+            moves.remove(move)
+            moves.insert(0, move)
+            if progress is not None:
+                progress(depth, move, score)
+            if not any(result[4] for result in results) or depth >= empties:
+                break
+        return best_move
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import sys
+import time
+from Game import Game
+
+
+KNOWN_NODES = {
+    4: [4, 12, 44, 128, 424, 1256, 3624, 9116, 20044, 36540, 50704, 57436, 59564, 59980, 60060],
+    6: [4, 12, 56, 244, 1364, 7604, 47740, 308716, 2114912, 14976792],
+    8: [4, 12, 56, 244, 1396, 8200, 55092, 390216, 3005288, 24571284, 212258800],
+    10: [4, 12, 56, 244, 1396, 8200, 55180, 392268, 3045812, 25168320],
+    12: [4, 12, 56, 244, 1396, 8200, 55180, 392268, 3046196, 25179208],
+    14: [4, 12, 56, 244, 1396, 8200, 55180, 392268, 3046196],
+    16: [4, 12, 56, 244, 1396, 8200, 55180, 392268, 3046196],
+}
+
+
+def run_perft(size, depth):
+    game = Game(True, size, False, True, 1)
+    start = time.perf_counter()
+    nodes = game.perft(depth)
+    elapsed = time.perf_counter() - start
+    return nodes, elapsed
+
+
+def get_expected(size, depth):
+    known = KNOWN_NODES.get(size, [])
+    return known[depth - 1] if depth <= len(known) else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Count leaf nodes of the legal move tree from the starting position.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=sorted(KNOWN_NODES))
+    parser.add_argument('--depth', type=int, default=6)
+    arguments = parser.parse_args(argv)
+
+    failed = False
+    for size in arguments.sizes:
+        for depth in range(1, arguments.depth + 1):
+            nodes, elapsed = run_perft(size, depth)
+            expected = get_expected(size, depth)
+            if expected is None:
+                status = 'unknown'
+            elif expected == nodes:
+                status = 'ok'
+            else:
+                status = f'MISMATCH (expected {expected})'
+                failed = True
+            speed = nodes / elapsed if elapsed > 0 else 0
+            print(f'{size}x{size} depth {depth}: {nodes} nodes, {elapsed:.3f} s, {speed:.0f} nodes/s, {status}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
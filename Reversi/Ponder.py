@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+
+import threading
+from Search import Search, SearchTimeout, CancelToken
+
+
+class Ponderer(Search):
+
+    def __init__(self, search):
+        super().__init__(None, None, search.max_depth, search.table, evaluator=search.evaluator)
+        self.endgame = search.endgame
+        self.__thread = None
+        self.__cancel = None
+        self.__results = {}
+        self.__target_depth = self.max_depth
+
+    @property
+    def is_pondering(self):
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start_pondering(self, board, is_white, target_depth=None):
+        self.stop_pondering()
+        self.__results = {}
+        if target_depth is not None:
+            self.__target_depth = target_depth
+        self.__cancel = CancelToken()
+        self.__thread = threading.Thread(target=self.ponder, args=(board.copy(), is_white), daemon=True)
+        self.__thread.start()
+
+    def stop_pondering(self):
+        if self.__thread is not None:
+            self.__cancel.cancel()
+            self.__thread.join()
+            self.__thread = None
+
+    def get_move(self, board, is_white):
+        self.stop_pondering()
+        if self.endgame is not None and self.endgame.can_solve(board):
+            return None
+        result = self.__results.get(board.get_hash(is_white))
+        if result is None:
+            return None
+        move, depth, complete = result
+        if not complete and depth < self.__target_depth:
+            return None
+        self.depth = depth
+        return move
+
+    def get_replies(self, board, is_white):
+        replies = self.order_moves(board, board.get_moves(is_white))
+        entry = self.table.get(board.get_hash(is_white))
+        if entry is not None and entry[4] in replies:
+            replies.remove(entry[4])
+            replies.insert(0, entry[4])
+        positions = []
+        for reply in replies:
+            board.place(reply, is_white)
+            positions.append(board.copy())
+            board.undo()
+        if len(positions) == 0:
+            positions.append(board.copy())
+        return positions
+
+    def ponder(self, board, is_white):
+        positions = self.get_replies(board, is_white)
+        bot_moves = {}
+        for position in positions:
+            moves = self.order_moves(position, position.get_moves(not is_white))
+            if len(moves) > 0:
+                bot_moves[position.get_hash(not is_white)] = (position, moves)
+        self.start(None, self.__cancel)
+        try:
+            if len(bot_moves) > 0:
+                predicted = next(iter(bot_moves))
+                for depth in range(1, self.__target_depth + 1):
+                    if not self.ponder_position(predicted, *bot_moves[predicted], not is_white, depth):
+                        break
+            for depth in range(1, self.max_depth + 1):
+                for key, (position, moves) in bot_moves.items():
+                    self.ponder_position(key, position, moves, not is_white, depth)
+                if all(result[2] for result in self.__results.values()):
+                    break
+        except SearchTimeout:
+            pass
+
+    def ponder_position(self, key, position, moves, is_white, depth):
+        result = self.__results.get(key)
+        if result is not None and (result[2] or result[1] >= depth):
+            return not result[2]
+        self._depth_limited = False
+        _, move = self.search_root(position, is_white, moves, depth)
+        moves.remove(move)
+        moves.insert(0, move)
+        self.__results[key] = (move, depth, not self._depth_limited)
+        return self._depth_limited
+
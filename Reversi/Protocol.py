@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+
+import struct
+from Bitboard import Bitboard
+
+
+class ProtocolError(ValueError):
+    messages = ()
+
+
+class Protocol:
+
+    VERSION = 1
+    HEADER = struct.Struct('<IBB')
+    MAX_LENGTH = 1 << 16
+    HEARTBEAT = 0
+    HELLO = 1
+    MOVE = 2
+    PASS = 3
+    SNAPSHOT = 4
+    JOIN = 5
+    REJECT = 6
+    SPECTATE = 7
+    HELLO_RECORD = struct.Struct('<BBB')
+    MOVE_RECORD = struct.Struct('<BB')
+    SNAPSHOT_RECORD = struct.Struct('<BB')
+    JOIN_RECORD = struct.Struct('<B')
+    SPECTATE_RECORD = struct.Struct('<I')
+
+    @classmethod
+    def frame(cls, opcode, payload=b''):
+        return cls.HEADER.pack(len(payload), cls.VERSION, opcode) + payload
+
+    @classmethod
+    def encode_heartbeat(cls):
+        return cls.frame(cls.HEARTBEAT)
+
+    @classmethod
+    def encode_hello(cls, board_size, me_first, is_new):
+        return cls.frame(cls.HELLO, cls.HELLO_RECORD.pack(board_size, me_first, is_new))
+
+    @classmethod
+    def encode_move(cls, x, y):
+        return cls.frame(cls.MOVE, cls.MOVE_RECORD.pack(x, y))
+
+    @classmethod
+    def encode_pass(cls):
+        return cls.frame(cls.PASS)
+
+    @classmethod
+    def encode_snapshot(cls, size, is_white_turn, white, black):
+        bitmap_size = get_bitmap_size(size)
+        payload = cls.SNAPSHOT_RECORD.pack(size, is_white_turn) + \
+            white.to_bytes(bitmap_size, 'little') + black.to_bytes(bitmap_size, 'little')
+        return cls.frame(cls.SNAPSHOT, payload)
+
+    @classmethod
+    def encode_join(cls, board_size):
+        return cls.frame(cls.JOIN, cls.JOIN_RECORD.pack(board_size))
+
+    @classmethod
+    def encode_reject(cls):
+        return cls.frame(cls.REJECT)
+
+    @classmethod
+    def encode_spectate(cls, match_number):
+        return cls.frame(cls.SPECTATE, cls.SPECTATE_RECORD.pack(match_number))
+
+    @classmethod
+    def decode(cls, opcode, payload):
+        try:
+            if opcode in (cls.HEARTBEAT, cls.PASS, cls.REJECT):
+                return None
+            if opcode == cls.JOIN:
+                return cls.JOIN_RECORD.unpack(payload)[0]
+            if opcode == cls.SPECTATE:
+                return cls.SPECTATE_RECORD.unpack(payload)[0]
+            if opcode == cls.HELLO:
+                board_size, me_first, is_new = cls.HELLO_RECORD.unpack(payload)
+                check_size(board_size)
+                return board_size, bool(me_first), bool(is_new)
+            if opcode == cls.MOVE:
+                return cls.MOVE_RECORD.unpack(payload)
+            if opcode == cls.SNAPSHOT:
+                size, is_white_turn = cls.SNAPSHOT_RECORD.unpack_from(payload)
+                check_size(size)
+                bitmap_size = get_bitmap_size(size)
+                if len(payload) != cls.SNAPSHOT_RECORD.size + 2 * bitmap_size:
+                    raise ProtocolError(f'Snapshot of {len(payload)} bytes for board size {size}')
+                start = cls.SNAPSHOT_RECORD.size
+                white = int.from_bytes(payload[start:start + bitmap_size], 'little')
+                black = int.from_bytes(payload[start + bitmap_size:], 'little')
+                if white & black != 0 or (white | black) >> (size * size) != 0:
+                    raise ProtocolError('Snapshot discs overlap or lie outside the board')
+                return size, bool(is_white_turn), white, black
+        except struct.error as error:
+            raise ProtocolError(str(error))
+        raise ProtocolError(f'Unknown opcode {opcode}')
+
+
+def get_bitmap_size(size):
+    return (size * size + 7) // 8
+
+
+def check_size(size):
+    if not Bitboard.MIN_SIZE <= size <= Bitboard.MAX_SIZE or size % 2 != 0:
+        raise ProtocolError(f'Unsupported board size {size}')
+
+
+class Decoder:
+
+    def __init__(self):
+        self.__buffer = bytearray()
+
+    def feed(self, data):
+        self.__buffer += data
+        messages = []
+        header_size = Protocol.HEADER.size
+        try:
+            while len(self.__buffer) >= header_size:
+                length, version, opcode = Protocol.HEADER.unpack_from(self.__buffer)
+                if version != Protocol.VERSION:
+                    raise ProtocolError(f'Unsupported protocol version {version}')
+                if length > Protocol.MAX_LENGTH:
+                    raise ProtocolError(f'Message of {length} bytes is too long')
+                if len(self.__buffer) < header_size + length:
+                    break
+                payload = bytes(self.__buffer[header_size:header_size + length])
+                del self.__buffer[:header_size + length]
+                messages.append((opcode, Protocol.decode(opcode, payload)))
+        except ProtocolError as error:
+            error.messages = messages
+            raise
+        return messages
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+
+import struct
+from Bitboard import Bitboard
+from Protocol import get_bitmap_size
+
+
+class SaveError(ValueError):
+    pass
+
+
+class SaveFile:
+
+    MAGIC = b'RVSV'
+    VERSION = 1
+    PASS = 0xFFFF
+    HEADER = struct.Struct('<4sBBBBBBH')
+    MOVE_RECORD = struct.Struct('<H')
+
+    @classmethod
+    def is_binary(cls, data):
+        return data[:len(cls.MAGIC)] == cls.MAGIC
+
+    @classmethod
+    def encode(cls, bot_active, bot_difficulty, size, is_white_turn, white, black, start, moves):
+        start_white, start_black, start_is_white_turn = start
+        bitmap_size = get_bitmap_size(size)
+        header = cls.HEADER.pack(cls.MAGIC, cls.VERSION, bot_active, bot_difficulty, size,
+                                 start_is_white_turn, is_white_turn, len(moves))
+        bitmaps = b''.join(bits.to_bytes(bitmap_size, 'little') for bits in (start_white, start_black, white, black))
+        return header + bitmaps + struct.pack(f'<{len(moves)}H', *moves)
+
+    @classmethod
+    def decode(cls, data):
+        try:
+            magic, version, bot_active, bot_difficulty, size, start_is_white_turn, is_white_turn, move_count = \
+                cls.HEADER.unpack_from(data)
+        except struct.error as error:
+            raise SaveError(str(error))
+        if magic != cls.MAGIC:
+            raise SaveError('Not a binary save file')
+        if version != cls.VERSION:
+            raise SaveError(f'Unsupported save version {version}')
+        if not Bitboard.MIN_SIZE <= size <= Bitboard.MAX_SIZE or size % 2 != 0:
+            raise SaveError(f'Unsupported board size {size}')
+        bitmap_size = get_bitmap_size(size)
+        expected_length = cls.HEADER.size + 4 * bitmap_size + move_count * cls.MOVE_RECORD.size
+        if len(data) != expected_length:
+            raise SaveError(f'Save of {len(data)} bytes, expected {expected_length}')
+        start = cls.HEADER.size
+        bitmaps = [int.from_bytes(data[start + i * bitmap_size:start + (i + 1) * bitmap_size], 'little')
+                   for i in range(4)]
+        moves = list(struct.unpack_from(f'<{move_count}H', data, start + 4 * bitmap_size))
+        if any(move >= size * size and move != cls.PASS for move in moves):
+            raise SaveError('Move outside of the board')
+        cls.check_position(size, bitmaps[0], bitmaps[1])
+        cls.check_position(size, bitmaps[2], bitmaps[3])
+        return (bool(bot_active), bot_difficulty, size, bool(is_white_turn), bitmaps[2], bitmaps[3],
+                (bitmaps[0], bitmaps[1], bool(start_is_white_turn)), moves)
+
+    @staticmethod
+    def check_position(size, white, black):
+        if white & black != 0 or (white | black) >> (size * size) != 0:
+            raise SaveError('Discs overlap or lie outside the board')
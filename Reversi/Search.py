@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+
+import threading
+import time
+from Bitboard import count_bits, iterate_bits
+from TranspositionTable import TranspositionTable
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class CancelToken:
+
+    def __init__(self):
+        self.__event = threading.Event()
+
+    def cancel(self):
+        self.__event.set()
+
+    @property
+    def is_cancelled(self):
+        return self.__event.is_set()
+
+
+class Search:
+
+    INFINITY = 1 << 30
+    END_GAME_WEIGHT = 1000
+    TIME_CHECK_INTERVAL = 256
+    ENDGAME_TIME_SHARE = 0.5
+    ENDGAME_NODE_SHARE = 0.5
+
+    def __init__(self, time_limit=1.0, node_limit=None, max_depth=64, table=None, endgame=None, evaluator=None):
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.table = table if table is not None else TranspositionTable()
+        self.endgame = endgame
+        self.evaluator = evaluator
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.solved = False
+        self._deadline = None
+        self._cancel = None
+        self._depth_limited = False
+
+    def get_best_move(self, board, is_white, deadline=None, cancel=None, progress=None):
+        board = board.copy()
+        moves = self.order_moves(board, board.get_moves(is_white))
+        self.depth = 0
+        self.score = 0
+        self.solved = False
+        if len(moves) == 0:
+            return None
+        self.start(deadline if deadline is not None else self.get_deadline(), cancel)
+        solved_move = self.solve_endgame(board, is_white)
+        if solved_move is not None:
+            if progress is not None:
+                progress(self.depth, solved_move, self.score)
+            return solved_move
+        best_move = moves[0]
+        empties = count_bits(board.empty)
+        for depth in range(1, self.max_depth + 1):
+            self._depth_limited = False
+            try:
+                score, move = self.search_root(board, is_white, moves, depth)
+            except SearchTimeout:
+                break
+            best_move = move
+            self.depth = depth
+            self.score = score
+            moves.remove(move)
+            moves.insert(0, move)
+            if progress is not None:
+                progress(depth, move, score)
+            if not self._depth_limited or depth >= empties:
+                break
+        return best_move
+
+    def solve_endgame(self, board, is_white):
+        if self.endgame is None or not self.endgame.can_solve(board):
+            return None
+        deadline = None
+        if self._deadline is not None:
+            now = time.time()
+            deadline = now + (self._deadline - now) * self.ENDGAME_TIME_SHARE
+        node_limit = None
+        if self.node_limit is not None:
+            node_limit = int(self.node_limit * self.ENDGAME_NODE_SHARE)
+        move = self.endgame.solve(board, is_white, deadline, node_limit, self._cancel)
+        if move is None:
+            self.nodes = 0
+            return None
+        self.nodes = self.endgame.nodes
+        self.solved = True
+        self.depth = count_bits(board.empty)
+        self.score = self.endgame.score * self.END_GAME_WEIGHT
+        return move
+
+    def get_deadline(self):
+        return time.time() + self.time_limit if self.time_limit is not None else None
+
+    def start(self, deadline, cancel=None):
+        self.nodes = 0
+        self._deadline = deadline
+        self._cancel = cancel
+
+    @property
+    def depth_limited(self):
+        return self._depth_limited
+
+    def search_root(self, board, is_white, moves, depth):
+        alpha = -self.INFINITY
+        best_move = moves[0]
+        for move in moves:
+            score = self.search_move(board, is_white, move, depth, alpha)
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def search_move(self, board, is_white, move, depth, alpha):
+        board.place(move, is_white)
+        try:
+            return -self.negamax(board, not is_white, depth - 1, -self.INFINITY, -alpha, False)
+        finally:
+            board.undo()
+
+    def negamax(self, board, is_white, depth, alpha, beta, passed):
+        self.count_node()
+        if depth == 0:
+            self._depth_limited = True
+            return self.evaluate(board, is_white)
+        key = board.get_hash(is_white)
+        entry = self.table.get(key)
+        table_move = None
+        if entry is not None:
+            _, entry_depth, entry_score, entry_bound, table_move = entry
+            if entry_depth >= depth:
+                if entry_bound == TranspositionTable.EXACT:
+                    self._depth_limited = True
+                    return entry_score
+                if entry_bound == TranspositionTable.LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    self._depth_limited = True
+                    return entry_score
+        moves = board.get_moves(is_white)
+        if moves == 0:
+            if passed:
+                return self.get_final_score(board, is_white)
+            return -self.negamax(board, not is_white, depth, -beta, -alpha, True)
+        original_alpha = alpha
+        if depth == 1 and self.evaluator is not None:
+            best_score, best_move = self.evaluate_children(board, is_white, moves)
+        else:
+            best_score, best_move = self.search_children(board, is_white, moves, depth, alpha, beta, table_move)
+        if best_score <= original_alpha:
+            bound = TranspositionTable.UPPER
+        elif best_score >= beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        self.table.store(key, depth, best_score, bound, best_move)
+        return best_score
+
+    def search_children(self, board, is_white, moves, depth, alpha, beta, table_move):
+        best_score = -self.INFINITY
+        best_move = None
+        for move in self.order_moves(board, moves, table_move):
+            board.place(move, is_white)
+            score = -self.negamax(board, not is_white, depth - 1, -beta, -alpha, False)
+            board.undo()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score, best_move
+
+    def evaluate_children(self, board, is_white, moves):
+        children = list(iterate_bits(moves))
+        whites = []
+        blacks = []
+        finished = {}
+        for number, move in enumerate(children):
+            self.count_node()
+            board.place(move, is_white)
+            whites.append(board.white)
+            blacks.append(board.black)
+            if board.empty == 0:
+                finished[number] = self.get_final_score(board, is_white)
+            board.undo()
+        self._depth_limited = True
+        scores = self.evaluator.evaluate_batch(board.size, whites, blacks, is_white).tolist()
+        for number, score in finished.items():
+            scores[number] = score
+        best = max(range(len(children)), key=lambda number: scores[number])
+        return scores[best], children[best]
+
+    def count_node(self):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchTimeout
+        if self.nodes % self.TIME_CHECK_INTERVAL == 0:
+            if self._deadline is not None and time.time() > self._deadline:
+                raise SearchTimeout
+            if self._cancel is not None and self._cancel.is_cancelled:
+                raise SearchTimeout
+
+    @staticmethod
+    def order_moves(board, moves, first=None):
+        corners = board.tables.corners
+        if first is not None and moves >> first & 1:
+            moves &= ~(1 << first)
+            return [first] + list(iterate_bits(moves & corners)) + list(iterate_bits(moves & ~corners))
+        return list(iterate_bits(moves & corners)) + list(iterate_bits(moves & ~corners))
+
+    def evaluate(self, board, is_white):
+        if board.empty == 0:
+            return self.get_final_score(board, is_white)
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(board, is_white)
+        return self.get_difference(board, is_white)
+
+    @staticmethod
+    def get_difference(board, is_white):
+        difference = board.white_count - board.black_count
+        return difference if is_white else -difference
+
+    def get_final_score(self, board, is_white):
+        return self.get_difference(board, is_white) * self.END_GAME_WEIGHT
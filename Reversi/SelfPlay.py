@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+
+import argparse
+import json
+import random
+import sys
+import time
+from multiprocessing import Pool
+from Game import Game
+from GameArchive import GameArchive
+from ParallelSearch import ParallelSearch
+from Endgame import EndgameSolver
+from TranspositionTable import TranspositionTable
+
+
+ARCHIVE_BATCH = 1000
+
+
+class BotConfig:
+
+    NAMES = [difficulty.lower() for difficulty in Game.BOT_DIFFICULTIES]
+    SETTINGS = {'time': float, 'nodes': int, 'depth': int, 'memory': int, 'workers': int, 'endgame': int}
+
+    def __init__(self, description):
+        name, _, settings = description.partition(':')
+        if name.lower() not in self.NAMES:
+            raise ValueError(f'Unknown bot: {name}')
+        self.description = description
+        self.difficulty = self.NAMES.index(name.lower())
+        self.time_limit = Game.HARD_BOT_TIME_LIMIT
+        self.node_limit = Game.HARD_BOT_NODE_LIMIT
+        self.max_depth = Game.HARD_BOT_MAX_DEPTH
+        self.memory = Game.HARD_BOT_TABLE_MEMORY
+        self.workers = Game.HARD_BOT_WORKERS
+        self.endgame = Game.HARD_BOT_SOLVE_ENDGAME
+        for setting in filter(None, settings.split(',')):
+            key, _, value = setting.partition('=')
+            if key not in self.SETTINGS:
+                raise ValueError(f'Unknown bot setting: {key}')
+            value = None if value == 'none' else self.SETTINGS[key](value)
+            if key == 'time':
+                self.time_limit = value
+            elif key == 'nodes':
+                self.node_limit = value
+            elif key == 'depth':
+                self.max_depth = value
+            elif key == 'workers':
+                self.workers = value
+            elif key == 'endgame':
+                self.endgame = bool(value)
+            else:
+                self.memory = value
+
+    def __str__(self):
+        return self.description
+
+    def create_search(self):
+        from Evaluation import Evaluator
+        return ParallelSearch(self.time_limit, self.node_limit, self.max_depth, TranspositionTable(self.memory),
+                              self.workers, EndgameSolver() if self.endgame else None,
+                              Evaluator() if Evaluator.AVAILABLE else None)
+
+    def make_turn(self, game, search):
+        if self.difficulty == 0:
+            return game.easy_bot_turn()
+        if self.difficulty == 1:
+            return game.normal_bot_turn()
+        return game.hard_bot_turn(search)
+
+
+def play_opening(game, plies, generator):
+    for _ in range(plies):
+        turns = game.get_possible_turns()
+        if len(turns) == 0:
+            break
+        game.make_turn(generator.choice(turns))
+
+
+def play_game(task):
+    number, size, black, white, opening_plies, seed, is_archived = task
+    configs = {False: BotConfig(black), True: BotConfig(white)}
+    searches = {color: config.create_search() for color, config in configs.items()}
+    game = Game(True, size, True, False, 0)
+    play_opening(game, opening_plies, random.Random(seed))
+    move_times = {Game.WHITE: [], Game.BLACK: []}
+    moves = 0
+    passes = 0
+    try:
+        while not game.is_finished:
+            is_white = game.is_white_turn
+            start = time.perf_counter()
+            turn = configs[is_white].make_turn(game, searches[is_white])
+            move_times[Game.WHITE if is_white else Game.BLACK].append(time.perf_counter() - start)
+            if turn is None:
+                passes += 1
+            else:
+                moves += 1
+    finally:
+        for search in searches.values():
+            search.close()
+    score = dict(game.score)
+    if score[Game.WHITE] == score[Game.BLACK]:
+        winner = 'Draw'
+    else:
+        winner = Game.WHITE if score[Game.WHITE] > score[Game.BLACK] else Game.BLACK
+    result = {
+        'game': number,
+        'size': size,
+        'seed': seed,
+        'black': black,
+        'white': white,
+        'winner': winner,
+        'score': score,
+        'moves': moves,
+        'passes': passes,
+        'time_per_move': {color: sum(times) / len(times) if len(times) > 0 else 0
+                          for color, times in move_times.items()},
+        'max_move_time': {color: max(times, default=0) for color, times in move_times.items()},
+    }
+    if is_archived:
+        result['entry'] = GameArchive.get_entry(game, black, white, 'selfplay')
+    return result
+
+
+def get_tasks(arguments):
+    for number in range(arguments.games):
+        black, white = arguments.black, arguments.white
+        if arguments.swap and number % 2 == 1:
+            black, white = white, black
+        yield (number, arguments.size, black, white, arguments.opening_plies, arguments.seed + number,
+               arguments.archive is not None)
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Play Reversi bot-vs-bot games and print results as JSON lines.')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--size', type=int, default=8, choices=range(4, 17, 2))
+    parser.add_argument('--black', default='normal',
+                        help='easy, normal, hard or hard:time=0.5,nodes=10000,depth=6,memory=1048576,workers=4,endgame=0')
+    parser.add_argument('--white', default='hard')
+    parser.add_argument('--swap', action='store_true', help='swap colours every other game')
+    parser.add_argument('--opening-plies', type=int, default=4, help='random moves played before the bots')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: CPU count)')
+    parser.add_argument('--output', default=None, help='file to append results to (default: stdout)')
+    parser.add_argument('--archive', default=None, help='SQLite game archive to add the finished games to')
+    arguments = parser.parse_args(argv)
+    try:
+        configs = [BotConfig(arguments.black), BotConfig(arguments.white)]
+    except ValueError as error:
+        parser.error(str(error))
+    if arguments.workers != 1 and any(config.workers != 1 for config in configs):
+        parser.error('bots with workers=N need --workers 1, pool processes cannot start their own pools')
+    return arguments
+
+
+def write_results(output, results, archive=None):
+    entries = []
+    for result in results:
+        entry = result.pop('entry', None)
+        if entry is not None:
+            entries.append(entry)
+            if len(entries) == ARCHIVE_BATCH:
+                archive.add_games(entries)
+                entries = []
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+    if len(entries) > 0:
+        archive.add_games(entries)
+
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+    output = open(arguments.output, 'a') if arguments.output is not None else sys.stdout
+    archive = GameArchive(arguments.archive) if arguments.archive is not None else None
+    try:
+        if arguments.workers == 1:
+            write_results(output, map(play_game, get_tasks(arguments)), archive)
+        else:
+            with Pool(arguments.workers) as pool:
+                write_results(output, pool.imap_unordered(play_game, get_tasks(arguments)), archive)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if archive is not None:
+            archive.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,9 @@ class SettingsWindow(QWidget):
     HEIGHT = BUTTON_SIZE * 2 + UPPER_SHIFT * 2 + BETWEEN_SHIFT
     TWO_BUTTONS_POSITIONS = (SIDE_SHIFT + BETWEEN_SHIFT + BUTTON_SIZE / 2,
                              WIDTH - SIDE_SHIFT - BETWEEN_SHIFT - BUTTON_SIZE * 3 / 2)
+    THREE_BUTTONS_POSITIONS = (BUTTON_SIZE / 2 + SIDE_SHIFT,
+                               BUTTON_SIZE * 3 / 2 + SIDE_SHIFT + BETWEEN_SHIFT * 3 / 2,
+                               BUTTON_SIZE * 5 / 2 + SIDE_SHIFT + BETWEEN_SHIFT * 3)
     ONE_LINE_UPPER_SHIFT = UPPER_SHIFT * 3 / 2
 
     def __init__(self):
@@ -28,14 +31,16 @@ class SettingsWindow(QWidget):
         self.__font = QFont('', 20)
         self.__board_size = 8
         self.__is_online = False
+        self.__is_lobby = False
         self.__is_player_first = True
         self.__is_bot_active = False
         self.__bot_difficulty = 1
         self.__ip = ''
+        self.__address = None
         self.socket = None
         self.ip_error = False
         self.is_new = True
-        self.load_data = ''
+        self.load_data = b''
 
         self.__controls = []
         self.__current_title = 'Game Mode'
@@ -92,11 +97,20 @@ class SettingsWindow(QWidget):
 
     def host_join(self):
         self.set_up()
-        self.__current_title = 'Host or Join?'
-        host = self.create_button("Host", self.TWO_BUTTONS_POSITIONS[0], self.ONE_LINE_UPPER_SHIFT, self.new_load)
-        join = self.create_button("Join", self.TWO_BUTTONS_POSITIONS[1], host.y(), self.ip)
+        self.__current_title = 'Host, Join or Lobby?'
+        host = self.create_button("Host", self.THREE_BUTTONS_POSITIONS[0], self.ONE_LINE_UPPER_SHIFT,
+                                  partial(self.choose_lobby, False, self.new_load))
+        join = self.create_button("Join", self.THREE_BUTTONS_POSITIONS[1], host.y(),
+                                  partial(self.choose_lobby, False, self.ip))
+        lobby = self.create_button("Lobby", self.THREE_BUTTONS_POSITIONS[2], host.y(),
+                                   partial(self.choose_lobby, True, self.choose_size))
         back = self.create_back_button(self.starting)
 
+    def choose_lobby(self, is_lobby, action):
+        self.__is_lobby = is_lobby
+        self.is_new = True
+        action()
+
     def new_load(self):
         self.set_up()
         self.__current_title = 'New or Load?'
@@ -127,12 +141,17 @@ class SettingsWindow(QWidget):
                                         self.SIDE_SHIFT + (i - 10) / 2 * (self.BUTTON_SIZE + self.BETWEEN_SHIFT),
                                         self.UPPER_SHIFT + self.BUTTON_SIZE + self.BETWEEN_SHIFT,
                                         partial(self.change_size, i))
-        back = self.create_back_button(self.new_load if self.__is_online else
-                                       (self.bot if self.__is_bot_active else self.pvp_pve))
+        if self.__is_lobby:
+            back = self.create_back_button(self.host_join)
+        else:
+            back = self.create_back_button(self.new_load if self.__is_online else
+                                           (self.bot if self.__is_bot_active else self.pvp_pve))
 
     def change_size(self, size):
         self.__board_size = size
-        if self.__is_online or self.__is_bot_active:
+        if self.__is_lobby:
+            self.ip()
+        elif self.__is_online or self.__is_bot_active:
             self.first()
         else:
             self.run()
@@ -162,6 +181,31 @@ class SettingsWindow(QWidget):
         self.server_timer.start(500, self)
         self.__current_title = "Waiting For Second Player To Connect\n" \
                                f"(Your IP: {self.socket.ip})"
+        label = self.show_corgi()
+
+        def back_function():
+            label.hide()
+            self.first()
+        back = self.create_back_button(back_function)
+
+    def wait_lobby(self):
+        self.set_up()
+        self.__address.hide()
+        self.socket.start(self.__board_size)
+        self.server_timer = QBasicTimer()
+        self.server_timer.start(500, self)
+        self.__current_title = 'Waiting For An Opponent\n' \
+                               f'(Board size: {self.__board_size}x{self.__board_size})'
+        label = self.show_corgi()
+
+        def back_function():
+            self.server_timer.stop()
+            self.socket.close()
+            label.hide()
+            self.ip()
+        back = self.create_back_button(back_function)
+
+    def show_corgi(self):
         label = QLabel(self)
         corgi = QMovie('images/BigCorgi.gif')
         size = self.HEIGHT - self.UPPER_SHIFT
@@ -170,32 +214,38 @@ class SettingsWindow(QWidget):
         label.setMovie(corgi)
         label.move((self.WIDTH - size) / 2, (self.HEIGHT - size))
         label.show()
-
-        def back_function():
-            label.hide()
-            self.first()
-        back = self.create_back_button(back_function)
+        return label
 
     def timerEvent(self, event):
         if self.socket.is_connected:
             self.server_timer.stop()
-            self.run_load_online() if self.__is_online and not self.is_new else self.run()
+            if self.__is_lobby:
+                self.joined()
+            else:
+                self.run_load_online() if self.__is_online and not self.is_new else self.run()
+        elif self.__is_lobby and self.socket.is_failed:
+            self.server_timer.stop()
+            self.ip()
+            self.ip_error = True
+            self.update()
 
     def ip(self):
         self.set_up()
-        self.__current_title = 'Enter Host IP'
+        self.__current_title = 'Enter Server Address' if self.__is_lobby else 'Enter Host IP'
         address = QLineEdit(self)
         address.setGeometry((self.WIDTH - 300) / 2, self.UPPER_SHIFT + self.BUTTON_SIZE - self.BETWEEN_SHIFT, 300, 50)
         address.setStyleSheet('background: white;')
         address.setFont(self.__font)
+        address.setText(self.__ip)
         address.textChanged[str].connect(self.change_ip)
         address.show()
+        self.__address = address
         enter = self.create_button('Enter', address.x(), self.UPPER_SHIFT + self.BUTTON_SIZE + self.BETWEEN_SHIFT,
                                    self.enter_ip, 300)
 
         def back_function():
             address.hide()
-            self.host_join()
+            self.choose_size() if self.__is_lobby else self.host_join()
             self.ip_error = False
         back = self.create_back_button(back_function)
 
@@ -205,17 +255,23 @@ class SettingsWindow(QWidget):
         self.__ip = text
 
     def enter_ip(self,):
-        self.socket = Client(self.__ip)
-        if self.socket.connect_to_server():
-            self.__board_size = self.socket.board_size
-            self.__is_player_first = self.socket.me_first
-            self.load_data = self.socket.load_data
-            self.ip_error = False
-            self.run_load_online() if self.__is_online and not self.is_new else self.run()
+        self.socket = Client.from_address(self.__ip)
+        if self.__is_lobby:
+            self.wait_lobby()
+        elif self.socket.connect_to_server():
+            self.joined()
         else:
             self.ip_error = True
             self.update()
 
+    def joined(self):
+        self.__board_size = self.socket.board_size
+        self.__is_player_first = self.socket.me_first
+        self.load_data = self.socket.load_data
+        self.is_new = self.socket.is_new
+        self.ip_error = False
+        self.run_load_online() if not self.is_new else self.run()
+
     def pvp_pve(self):
         self.set_up()
         self.__current_title = 'Choose Game Mode'
@@ -246,7 +302,8 @@ class SettingsWindow(QWidget):
                                                      'Save Files (*.save)')[0]
         if load_file_name == '':
             return
-        self.load_data = open(load_file_name, 'r').read()
+        with open(load_file_name, 'rb') as file:
+            self.load_data = file.read()
         if self.__is_online:
             self.first()
         else:
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+
+class TranspositionTable:
+
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+    ENTRY_SIZE = 160
+    DEFAULT_MEMORY = 16 * 1024 * 1024
+
+    def __init__(self, memory_limit=DEFAULT_MEMORY):
+        self.__memory_limit = memory_limit
+        self.__buckets = max(1, memory_limit // (self.ENTRY_SIZE * 2))
+        self.__depth_preferred = [None] * self.__buckets
+        self.__always_replace = [None] * self.__buckets
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def memory_limit(self):
+        return self.__memory_limit
+
+    @property
+    def buckets(self):
+        return self.__buckets
+
+    @property
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes > 0 else 0
+
+    def get(self, key):
+        bucket = key % self.__buckets
+        entry = self.__depth_preferred[bucket]
+        if entry is None or entry[0] != key:
+            entry = self.__always_replace[bucket]
+            if entry is None or entry[0] != key:
+                self.misses += 1
+                return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, score, bound, move):
+        bucket = key % self.__buckets
+        entry = (key, depth, score, bound, move)
+        preferred = self.__depth_preferred[bucket]
+        if preferred is None or preferred[0] == key or preferred[1] <= depth:
+            if preferred is not None and preferred[0] != key:
+                self.__always_replace[bucket] = preferred
+            self.__depth_preferred[bucket] = entry
+        else:
+            self.__always_replace[bucket] = entry
+
+    def clear(self):
+        self.__depth_preferred = [None] * self.__buckets
+        self.__always_replace = [None] * self.__buckets
+        self.hits = 0
+        self.misses = 0
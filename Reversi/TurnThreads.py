@@ -1,4 +1,4 @@
-from PyQt5.QtCore import QThread
+from PyQt5.QtCore import QThread, pyqtSignal
 from Point import Point
 from Game import Game
 import time
@@ -6,7 +6,10 @@ import time
 
 class TurnThread(QThread):
 
-    def __init__(self, game_window, image_size, shift, bot_speed, game, pass_button, button):
+    progress = pyqtSignal(int, int, int)
+    bot_finished = pyqtSignal(float)
+
+    def __init__(self, game_window, image_size, shift, game, pass_button, button, cancel):
         super().__init__()
         self.daemon = True
         self.__game_window = game_window
@@ -15,7 +18,7 @@ class TurnThread(QThread):
         self.__pass_button = pass_button
         self.__image_size = image_size
         self.__shift = shift
-        self.__bot_speed = bot_speed
+        self.__cancel = cancel
 
     def player_turn(self):
         coordinates = Point(self.__button.x(), self.__button.y()).to_cell_coordinates(self.__image_size,
@@ -31,8 +34,8 @@ class TurnThread(QThread):
         self.__game_window.copy_game_items()
 
     def bot_turn(self):
-        time.sleep(self.__bot_speed)
-        bot_checker_coordinates = self.__game.bot_turn()
+        start = time.perf_counter()
+        bot_checker_coordinates = self.__game.bot_turn(self.__cancel, self.progress.emit)
         success = bot_checker_coordinates is not None
         if success:
             self.__game_window.remove_button(bot_checker_coordinates)
@@ -41,7 +44,7 @@ class TurnThread(QThread):
             log_message = 'passed'
         bot_color = Game.WHITE if self.__game.BOT_IS_WHITE else Game.BLACK
         self.__game_window.log(f"Bot's turn\t({bot_color}): {log_message}")
-        self.__game_window.copy_game_items()
+        self.bot_finished.emit(time.perf_counter() - start)
 
     def run(self):
         self.player_turn()
@@ -51,24 +54,25 @@ class TurnThread(QThread):
             return
         if self.__game.bot_active:
             self.bot_turn()
-        if self.__game.is_finished:
-            self.__game_window.is_game_over = True
+            return
         self.__game_window.highlight_buttons()
-        self.__game_window.update()
 
 
 class BotThread(QThread):
 
-    def __init__(self, game_window, bot_speed, game):
+    progress = pyqtSignal(int, int, int)
+    bot_finished = pyqtSignal(float)
+
+    def __init__(self, game_window, game, cancel):
         super().__init__()
         self.daemon = True
         self.__game_window = game_window
         self.__game = game
-        self.__bot_speed = bot_speed
+        self.__cancel = cancel
 
     def run(self):
-        time.sleep(self.__bot_speed)
-        bot_checker_coordinates = self.__game.bot_turn()
+        start = time.perf_counter()
+        bot_checker_coordinates = self.__game.bot_turn(self.__cancel, self.progress.emit)
         success = bot_checker_coordinates is not None
         if success:
             self.__game_window.remove_button(bot_checker_coordinates)
@@ -77,32 +81,5 @@ class BotThread(QThread):
             log_message = 'passed'
         bot_color = Game.WHITE if self.__game.BOT_IS_WHITE else Game.BLACK
         self.__game_window.log(f"Bot's turn\t({bot_color}): {log_message}")
-        self.__game_window.copy_game_items()
-        self.__game_window.highlight_buttons()
-
-
-class OnlineThread(QThread):
-
-    def __init__(self, game, game_window, coordinates, just_waiting=False):
-        super().__init__()
-        self.daemon = True
-        self.game = game
-        self.game_window = game_window
-        self.coordinates = coordinates
-        self.just_waiting = just_waiting
-
-    def check_game(self):
-        if self.game.is_finished:
-            self.game_window.is_game_over = True
-            return True
-
-    def run(self):
-        if not self.just_waiting:
-            self.game_window.socket.make_turn(self.game, self.game_window, self.coordinates)
-        if self.check_game() or self.game_window.connection_lost:
-            return
-        self.game_window.update()
-        self.game_window.socket.wait_for_turn(self.game, self.game_window)
-        if self.check_game() or self.game_window.connection_lost:
-            return
+        self.bot_finished.emit(time.perf_counter() - start)
 
@@ -1,8 +1,31 @@
 #!/usr/bin/env python3
 
 
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
 from Game import Game
 from Point import Point
+from Bitboard import Bitboard, BoardTables, count_bits
+from Search import Search, CancelToken
+from Endgame import EndgameSolver
+from TranspositionTable import TranspositionTable
+from SelfPlay import BotConfig, play_game
+from Benchmark import Benchmark, compare
+from Perft import KNOWN_NODES
+from ParallelSearch import ParallelSearch
+from OpeningBook import OpeningBook, BookBuilder, get_canonical
+from Evaluation import Evaluator, EvaluationTables, get_moves_planes
+from Ponder import Ponderer
+from Network import Broadcast, Connection, Listener
+from Protocol import Protocol, ProtocolError, Decoder
+from GameServer import GameServer
+from SaveFile import SaveFile, SaveError
+from GameLog import GameLog, LogWriter
+from GameArchive import GameArchive
 
 
 def test_starting_checkers():
@@ -77,15 +100,10 @@ def test_bot():
 
 def test_save():
     game = Game(True, 8, False, True, 1)
-    assert game.get_save() == """pvp
-8
-Black
-3 3
-4 4
-
-4 3
-3 4
-"""
+    save = game.get_save()
+    assert SaveFile.is_binary(save)
+    assert SaveFile.decode(save) == (False, 1, 8, False, game.board.white, game.board.black,
+                                     (game.board.white, game.board.black, False), [])
 
 
 def test_load():
@@ -101,3 +119,777 @@ def test_load():
     game1 = Game(False, save)
     game2 = Game(True, 8, False, True, 1)
     assert len(game1.checkers) == len(game2.checkers)
+    game3 = Game(False, '\n'.join(save).encode())
+    assert (game3.board.white, game3.board.black) == (game2.board.white, game2.board.black)
+    assert game3.bot_active and game3.BOT_DIFFICULTY == 1 and game3.moves == []
+
+
+def test_binary_save_keeps_history():
+    game = Game(True, 16, True, True, 2)
+    while not game.is_finished:
+        turns = game.get_possible_turns()
+        if len(turns) == 0:
+            game.pass_turn()
+        else:
+            game.make_turn(turns[len(turns) // 3])
+    save = game.get_save()
+    assert len(save) < 1024
+    loaded = Game(False, save)
+    assert loaded.moves == game.moves and SaveFile.PASS in loaded.moves
+    assert (loaded.board.white, loaded.board.black, loaded.is_white_turn) == \
+           (game.board.white, game.board.black, game.is_white_turn)
+    assert loaded.score == game.score and loaded.bot_active and loaded.BOT_DIFFICULTY == 2
+    while len(loaded.moves) > 0:
+        loaded.undo_turn()
+    assert (loaded.board.white_count, loaded.board.black_count, loaded.is_white_turn) == (2, 2, False)
+    with pytest.raises(SaveError):
+        Game(False, save[:-1])
+    with pytest.raises(SaveError):
+        Game(False, save[:-2] + bytes([0, 0]))
+    for size in (0, 5, 20):
+        with pytest.raises(SaveError, match='board size'):
+            SaveFile.decode(SaveFile.encode(False, 0, size, False, 0, 0, (0, 0, False), []))
+    start = Game(True, 8, False, True, 1)
+    white, black = start.board.white, start.board.black
+    with pytest.raises(SaveError, match='overlap'):
+        Game(False, SaveFile.encode(False, 0, 8, False, 7, 7, (7, 7, False), []))
+    with pytest.raises(SaveError, match='overlap'):
+        Game(False, SaveFile.encode(False, 0, 6, False, 1 << 36, 0, (1 << 36, 0, False), []))
+    with pytest.raises(SaveError, match='Illegal move'):
+        Game(False, SaveFile.encode(False, 0, 8, True, white, black | 1, (white, black, False), [0]))
+
+
+def test_added_checkers_are_saved():
+    game = Game(True, 8, False, True, 1)
+    game.make_turn(game.get_possible_turns()[0])
+    game.add_checker(Point(0, 0), True)
+    game.make_turn(game.get_possible_turns()[0])
+    loaded = Game(False, game.get_save())
+    assert (loaded.board.white, loaded.board.black, loaded.is_white_turn) == \
+           (game.board.white, game.board.black, game.is_white_turn)
+    assert loaded.moves == game.moves
+
+
+def test_search_is_created_on_demand():
+    game = Game(True, 8, True, True, 1)
+    game.normal_bot_turn()
+    game.stop_pondering()
+    assert game._Game__search is None
+    assert game.search is game.search
+
+
+def test_engine_imports_without_numpy():
+    code = 'import sys, Game, Perft, Benchmark; print("numpy" in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.strip() == 'False'
+
+
+def test_shipped_saves_load():
+    for name in ('offline/pvp3.save', 'offline/pvp4.save', 'offline/bot1.save'):
+        with open(f'saves/{name}', 'rb') as file:
+            game = Game(False, file.read())
+        assert game.score[Game.WHITE] == count_bits(game.board.white) > 0
+    with pytest.raises(ValueError, match='got 20'):
+        Bitboard(20)
+
+
+def test_bitboard_starting_moves():
+    for size in range(4, 17, 2):
+        game = Game(True, size, False, True, 1)
+        assert count_bits(game.board.get_moves(False)) == 4
+        assert len(game.get_possible_turns()) == 4
+
+
+def test_bitboard_flips_do_not_wrap():
+    board = Bitboard(8)
+    board.black = 1 << board.index(7, 3)
+    board.white = 1 << board.index(0, 4)
+    assert board.get_flips(board.index(6, 3), True) == 0
+    assert board.get_moves(True) == 0
+
+
+def test_make_turn_flips():
+    game = Game(True, 8, False, True, 1)
+    game.make_turn(Point(2, 3))
+    assert game.score[Game.BLACK] == 4
+    assert game.score[Game.WHITE] == 1
+    assert game.get_checker_at(Point(3, 3)).is_white is False
+
+
+def test_undo_turn():
+    game = Game(True, 8, False, True, 1)
+    start = (game.board.white, game.board.black, game.is_white_turn, dict(game.score))
+    for _ in range(10):
+        turns = game.get_possible_turns()
+        if len(turns) == 0:
+            break
+        game.make_turn(turns[-1])
+    while len(game.board.history) > 0:
+        game.undo_turn()
+    assert (game.board.white, game.board.black, game.is_white_turn, dict(game.score)) == start
+
+
+def test_search_solves_small_board():
+    game = Game(True, 4, False, True, 1)
+    search = Search(None)
+    move = search.get_best_move(game.board, False)
+    assert move in [game.to_index(turn) for turn in game.get_possible_turns()]
+    assert search.score == -8 * Search.END_GAME_WEIGHT
+
+
+def test_search_reports_progress():
+    game = Game(True, 8, False, True, 1)
+    reports = []
+    search = Search(None, None, 3)
+    move = search.get_best_move(game.board, False, progress=lambda *report: reports.append(report))
+    assert [report[0] for report in reports] == [1, 2, 3]
+    assert reports[-1][1:] == (move, search.score)
+
+
+def test_search_cancel():
+    game = Game(True, 16, False, True, 1)
+    cancel = CancelToken()
+    cancel.cancel()
+    start = time.time()
+    move = Search(None).get_best_move(game.board, False, cancel=cancel)
+    assert move in [game.to_index(turn) for turn in game.get_possible_turns()]
+    assert time.time() - start < 1
+    game = Game(True, 6, False, True, 1)
+    start = time.time()
+    assert Search(10).get_best_move(game.board, False, time.time() + 0.1) is not None
+    assert time.time() - start < 1
+
+
+def test_endgame_solver():
+    game = Game(True, 4, False, True, 1)
+    solver = EndgameSolver()
+    move = solver.solve(game.board, False)
+    assert move in [game.to_index(turn) for turn in game.get_possible_turns()]
+    assert solver.exact
+    assert solver.score == -8
+    search = Search(None, endgame=EndgameSolver())
+    assert search.get_best_move(game.board, False) is not None
+    assert search.solved
+    assert search.score == -8 * Search.END_GAME_WEIGHT
+
+
+def test_endgame_solver_falls_back_to_search():
+    game = Game(True, 4, False, True, 1)
+    solver = EndgameSolver()
+    assert solver.solve(game.board, False, node_limit=50) is None
+    assert not solver.exact
+    search = Search(None, 50, endgame=solver)
+    assert search.get_best_move(game.board, False) is not None
+    assert not search.solved
+    assert search.depth > 0
+
+
+def test_endgame_solver_shares_node_limit():
+    game = Game(True, 8, False, True, 0)
+    while count_bits(game.board.empty) > 12:
+        game.easy_bot_turn()
+    search = Search(None, 10000, endgame=EndgameSolver())
+    assert search.get_best_move(game.board, game.is_white_turn) is not None
+    assert not search.solved
+    assert search.endgame.nodes <= 5001
+    assert search.depth > 0
+
+
+def test_search_node_limit():
+    game = Game(True, 16, False, True, 1)
+    search = Search(None, 500)
+    move = search.get_best_move(game.board, False)
+    assert move is not None
+    assert search.nodes <= 501
+    assert len(game.board.history) == 0
+
+
+def test_incremental_hash():
+    game = Game(True, 10, False, True, 1)
+    start = game.board.hash
+    assert start == game.board.compute_hash()
+    for _ in range(8):
+        game.make_turn(game.get_possible_turns()[0])
+        assert game.board.hash == game.board.compute_hash()
+    while len(game.board.history) > 0:
+        game.undo_turn()
+    assert game.board.hash == start
+    assert game.board.get_hash(True) != game.board.get_hash(False)
+
+
+def test_transposition_table_replacement():
+    table = TranspositionTable(TranspositionTable.ENTRY_SIZE * 2)
+    assert table.buckets == 1
+    table.store(1, 5, 10, TranspositionTable.EXACT, 3)
+    table.store(2, 2, 20, TranspositionTable.LOWER, 4)
+    table.store(3, 1, 30, TranspositionTable.UPPER, 5)
+    assert table.get(1)[1:] == (5, 10, TranspositionTable.EXACT, 3)
+    assert table.get(2) is None
+    assert table.get(3)[2] == 30
+    table.store(4, 6, 40, TranspositionTable.EXACT, 6)
+    assert table.get(4) is not None
+    assert table.get(1) is not None
+    assert table.hits == 4
+    assert table.misses == 1
+
+
+def test_board_tables_shared():
+    game1 = Game(True, 12, False, True, 1)
+    game2 = Game(True, 12, True, False, 2)
+    assert game1.board.tables is game2.board.tables
+    assert game1.board.tables is BoardTables.get(12)
+    tables = BoardTables.get(8)
+    assert len(tables.rays[0]) == 3
+    assert count_bits(tables.neighbours[0]) == 3
+    assert count_bits(tables.neighbours[tables.size + 1]) == 8
+
+
+def test_frontier_tracks_moves():
+    game = Game(True, 8, False, True, 1)
+
+    def get_frontier():
+        frontier = 0
+        for coordinates in game.occupied_coordinates:
+            frontier |= game.board.tables.neighbours[game.to_index(coordinates)]
+        return frontier & game.board.empty
+
+    start = game.board.frontier
+    assert start == get_frontier()
+    for _ in range(12):
+        turns = game.get_possible_turns()
+        if len(turns) == 0:
+            break
+        game.make_turn(turns[0])
+        assert game.board.frontier == get_frontier()
+    while len(game.board.history) > 0:
+        game.undo_turn()
+    assert game.board.frontier == start
+
+
+def test_incremental_score():
+    game = Game(True, 6, False, True, 1)
+    while not game.is_finished:
+        turns = game.get_possible_turns()
+        if len(turns) == 0:
+            game.pass_turn()
+            continue
+        game.make_turn(turns[len(turns) // 2])
+        assert game.score[Game.WHITE] == count_bits(game.board.white)
+        assert game.score[Game.BLACK] == count_bits(game.board.black)
+    while len(game.board.history) > 0:
+        game.board.undo()
+    assert (game.board.white_count, game.board.black_count) == (2, 2)
+
+
+def test_engine_is_headless():
+    assert 'PyQt5' not in sys.modules
+    game = Game(True, 8, False, True, 1)
+    assert game.get_cell(Point(2, 3)).coordinates == Point(2, 3)
+
+
+def test_bot_config():
+    config = BotConfig('hard:time=none,nodes=2000,depth=3')
+    assert config.difficulty == 2
+    search = config.create_search()
+    assert (search.time_limit, search.node_limit, search.max_depth) == (None, 2000, 3)
+    assert BotConfig('Easy').difficulty == 0
+
+
+def test_self_play_game():
+    result = play_game((0, 6, 'easy', 'hard:time=none,nodes=300', 2, 0, False))
+    assert result['winner'] in [Game.WHITE, Game.BLACK, 'Draw']
+    assert sum(result['score'].values()) == result['moves'] + 2 + 4
+    assert 'entry' not in result
+
+
+def test_benchmark_and_compare():
+    results = Benchmark([4], 3, 2, 'hard:time=none,nodes=200').run()
+    metrics = results['sizes']['4']
+    assert metrics['move_generation'] > 0
+    assert set(metrics['hard']) == {'p50', 'p90', 'p99', 'max'}
+    assert compare(results, results, 0.1) == []
+    slower = json.loads(json.dumps(results))
+    slower['sizes']['4']['make_undo'] /= 2
+    slower['sizes']['4']['easy']['p50'] *= 2
+    assert len(compare(results, slower, 0.1)) == 2
+
+
+def test_perft():
+    for size, known in KNOWN_NODES.items():
+        depth = 8 if size == 4 else 4
+        game = Game(True, size, False, True, 1)
+        assert [game.perft(d) for d in range(1, depth + 1)] == known[:depth]
+        assert len(game.board.history) == 0
+
+
+def test_perft_counts_passes():
+    board = Bitboard(4)
+    board.put(board.index(0, 0), True)
+    board.put(board.index(1, 0), True)
+    board.put(board.index(2, 0), False)
+    assert board.get_moves(False) == 0
+    assert [board.perft(depth, False) for depth in range(1, 4)] == [1, 1, 1]
+
+
+def test_parallel_search_matches_single_core():
+    game = Game(True, 8, False, True, 1)
+    for _ in range(6):
+        game.make_turn(game.get_possible_turns()[-1])
+    single = Search(None, None, 3)
+    parallel = ParallelSearch(None, None, 3, workers=2)
+    try:
+        single.get_best_move(game.board, game.is_white_turn)
+        parallel.get_best_move(game.board, game.is_white_turn)
+    finally:
+        parallel.close()
+    assert parallel.depth == single.depth == 3
+    assert parallel.score == single.score
+
+
+def test_batched_mobility_matches_bitboard():
+    pytest.importorskip('numpy')
+    for size in (4, 6, 8, 10):
+        game = Game(True, size, False, True, 1)
+        for _ in range(5):
+            game.make_turn(game.get_possible_turns()[0])
+        tables = EvaluationTables.get(size)
+        white = tables.get_planes([game.board.white])
+        black = tables.get_planes([game.board.black])
+        moves = get_moves_planes(black, white, ~(white | black))
+        assert int(moves.sum()) == count_bits(game.board.get_moves(False))
+
+
+def test_batched_evaluation():
+    pytest.importorskip('numpy')
+    game = Game(True, 8, False, True, 1)
+    for _ in range(6):
+        game.make_turn(game.get_possible_turns()[-1])
+    evaluator = Evaluator()
+    board = game.board
+    assert evaluator.evaluate(board, True) == -evaluator.evaluate(board, False)
+    scores = evaluator.evaluate_batch(8, [board.white, board.black], [board.black, board.white], True)
+    assert scores[0] == -scores[1]
+    batched = Search(None, None, 3, evaluator=evaluator)
+    batched.get_best_move(board, game.is_white_turn)
+    parallel = ParallelSearch(None, None, 3, workers=2, evaluator=evaluator)
+    try:
+        parallel.get_best_move(board, game.is_white_turn)
+    finally:
+        parallel.close()
+    assert batched.score == parallel.score
+
+
+def test_pondering_reuses_reply_search():
+    game = Game(True, 6, False, True, 1)
+    ponderer = Ponderer(Search(None, None, 3))
+    ponderer.start_pondering(game.board, False, 3)
+    while ponderer.is_pondering:
+        time.sleep(0.01)
+    game.make_turn(game.get_possible_turns()[0])
+    move = ponderer.get_move(game.board, True)
+    assert move in [game.to_index(turn) for turn in game.get_possible_turns()]
+    assert ponderer.depth == 3
+    game.make_turn(game.to_point(move))
+    assert ponderer.get_move(game.board, False) is None
+
+
+def test_pondering_stops_without_result():
+    game = Game(True, 16, False, True, 1)
+    ponderer = Ponderer(Search(None))
+    ponderer.start_pondering(game.board, False, 64)
+    game.make_turn(game.get_possible_turns()[0])
+    assert ponderer.get_move(game.board, True) is None
+    assert not ponderer.is_pondering
+
+
+def test_canonical_position_is_symmetric():
+    first = Game(True, 8, False, True, 1)
+    first.make_turn(Point(2, 3))
+    second = Game(True, 8, False, True, 1)
+    second.make_turn(Point(5, 4))
+    assert get_canonical(first.board, True)[0] == get_canonical(second.board, True)[0]
+    assert get_canonical(first.board, True)[0] != get_canonical(first.board, False)[0]
+
+
+def test_opening_book(tmp_path):
+    path = str(tmp_path / '6x6.book')
+    builder = BookBuilder(6, Search(None, None, 2))
+    entries = builder.build(2)
+    OpeningBook.write(path, 6, entries)
+    book = OpeningBook(path)
+    try:
+        assert len(book) == len(entries) > 1
+        game = Game(True, 6, False, True, 1)
+        for _ in range(2):
+            move = book.get_move(game.board, game.is_white_turn)
+            assert game.board.get_moves(game.is_white_turn) >> move & 1
+            game.make_turn(game.to_point(move))
+        assert book.get_entries() == entries
+        assert book.get_move(Game(True, 8, False, True, 1).board, False) is None
+    finally:
+        book.close()
+    with open(path, 'r+b') as file:
+        file.write(b'XXXX')
+    with pytest.raises(ValueError):
+        OpeningBook(path)
+
+
+def test_protocol_incremental_decoding():
+    game = Game(True, 16, False, True, 1)
+    for _ in range(10):
+        game.make_turn(game.get_possible_turns()[0])
+    board = game.board
+    data = Protocol.encode_hello(16, True, False) + \
+        Protocol.encode_snapshot(16, game.is_white_turn, board.white, board.black) + \
+        Protocol.encode_move(15, 0) + Protocol.encode_pass()
+    assert len(Protocol.encode_move(15, 0)) == Protocol.HEADER.size + 2
+    decoder = Decoder()
+    messages = []
+    for index in range(len(data)):
+        messages += decoder.feed(data[index:index + 1])
+    assert messages == [(Protocol.HELLO, (16, True, False)),
+                        (Protocol.SNAPSHOT, (16, game.is_white_turn, board.white, board.black)),
+                        (Protocol.MOVE, (15, 0)), (Protocol.PASS, None)]
+    assert Decoder().feed(data) == messages
+
+
+def test_protocol_rejects_bad_messages():
+    with pytest.raises(ProtocolError):
+        Decoder().feed(Protocol.HEADER.pack(0, Protocol.VERSION + 1, Protocol.PASS))
+    with pytest.raises(ProtocolError):
+        Decoder().feed(Protocol.HEADER.pack(Protocol.MAX_LENGTH + 1, Protocol.VERSION, Protocol.SNAPSHOT))
+    with pytest.raises(ProtocolError):
+        Decoder().feed(Protocol.frame(Protocol.MOVE, b'\x01'))
+    with pytest.raises(ProtocolError):
+        Decoder().feed(Protocol.frame(99))
+    for data in (Protocol.encode_hello(5, True, True), Protocol.encode_hello(20, True, True),
+                 Protocol.encode_snapshot(5, True, 0, 0), Protocol.encode_snapshot(4, True, 0b111, 0b111),
+                 Protocol.encode_snapshot(6, True, 1 << 36, 1)):
+        with pytest.raises(ProtocolError):
+            Decoder().feed(data)
+    with pytest.raises(ProtocolError) as error:
+        Decoder().feed(Protocol.encode_move(1, 2) + Protocol.encode_pass() + Protocol.frame(99))
+    assert error.value.messages == [(Protocol.MOVE, (1, 2)), (Protocol.PASS, None)]
+
+
+def test_connection_messages_and_heartbeats():
+    accepted = []
+    listener = Listener(0, accepted.append, 0.05, 0.5)
+    listener.start()
+    client = Connection.connect('127.0.0.1', listener.port, 1, 0.05, 0.5)
+    try:
+        client.send(Protocol.encode_move(2, 3))
+        client.send(Protocol.encode_snapshot(16, True, 1 << 255, 1))
+        deadline = time.time() + 2
+        while len(accepted) == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        server = accepted[0]
+        assert server.receive_one(1) == (Protocol.MOVE, (2, 3))
+        assert server.receive_one(1) == (Protocol.SNAPSHOT, (16, True, 1 << 255, 1))
+        time.sleep(0.8)
+        assert server.is_open and client.is_open
+        server.send(Protocol.encode_pass())
+        assert client.receive_one(1) == (Protocol.PASS, None)
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_connection_detects_silent_peer():
+    accepted = []
+    listener = Listener(0, accepted.append, 0.05, 0.3)
+    listener.start()
+    client = Connection.connect('127.0.0.1', listener.port, 1, 10, 10)
+    try:
+        deadline = time.time() + 2
+        while len(accepted) == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        lost = []
+        accepted[0].set_handlers(None, lambda: lost.append(True))
+        while len(lost) == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        assert lost == [True]
+        assert not accepted[0].is_open
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_connection_receive_one_fails_on_lost_peer():
+    accepted = []
+    listener = Listener(0, accepted.append, 10, 10)
+    listener.start()
+    client = Connection.connect('127.0.0.1', listener.port, 1, 10, 10)
+    try:
+        deadline = time.time() + 2
+        while len(accepted) == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        lost = []
+        client.set_handlers(None, lambda: lost.append(True))
+        accepted[0].close()
+        start = time.time()
+        with pytest.raises(ConnectionError):
+            client.receive_one(5)
+        assert time.time() - start < 1
+        assert lost == [True]
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_game_server_matchmaking_and_validation():
+    server = GameServer(0)
+    server.start()
+    clients = [Connection.connect('127.0.0.1', server.port) for _ in range(200)]
+    try:
+        black, white = clients[:2]
+        black.send(Protocol.encode_join(6))
+        deadline = time.time() + 2
+        while len(server.lobby) == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        white.send(Protocol.encode_join(6))
+        assert black.receive_one(2) == (Protocol.HELLO, (6, True, True))
+        assert white.receive_one(2) == (Protocol.HELLO, (6, False, True))
+        for number, client in enumerate(clients[2:]):
+            client.send(Protocol.encode_join(8 if number % 4 < 2 else 10))
+        for client in clients[2:]:
+            opcode, (size, _, _) = client.receive_one(2)
+            assert opcode == Protocol.HELLO and size in (8, 10)
+        assert server.match_count == 100
+        white.send(Protocol.encode_move(2, 3))
+        assert white.receive_one(2) == (Protocol.REJECT, None)
+        black.send(Protocol.encode_move(0, 0))
+        assert black.receive_one(2) == (Protocol.REJECT, None)
+        black.send(Protocol.encode_pass())
+        assert white.receive_one(2) == (Protocol.PASS, None)
+        game = Game(True, 6, False, True, 1)
+        game.pass_turn()
+        turn = game.get_possible_turns()[0]
+        white.send(Protocol.encode_move(turn.x, turn.y))
+        assert black.receive_one(2) == (Protocol.MOVE, (turn.x, turn.y))
+        black.close()
+        deadline = time.time() + 2
+        while white.is_open and time.time() < deadline:
+            time.sleep(0.01)
+        assert not white.is_open
+        assert server.match_count == 99
+    finally:
+        for client in clients:
+            client.close()
+        server.close()
+
+
+class BufferedConnection:
+
+    def __init__(self):
+        self.is_open = True
+        self.write_buffer_size = 0
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+    def close(self):
+        self.is_open = False
+
+
+def test_broadcast_skips_slow_subscribers():
+    broadcast = Broadcast(100)
+    fast, slow, closed = BufferedConnection(), BufferedConnection(), BufferedConnection()
+    for connection in (fast, slow, closed):
+        broadcast.subscribe(connection, b'start')
+    closed.is_open = False
+    slow.write_buffer_size = 101
+    snapshots = []
+
+    def get_snapshot():
+        snapshots.append(len(snapshots))
+        return b'snapshot'
+    move = Protocol.encode_move(2, 3)
+    broadcast.publish(move, get_snapshot)
+    broadcast.publish(move, get_snapshot)
+    assert fast.written == [b'start', move, move]
+    assert fast.written[1] is fast.written[2] is move
+    assert slow.written == [b'start']
+    assert closed not in broadcast.subscribers
+    slow.write_buffer_size = 0
+    broadcast.publish(move, get_snapshot)
+    assert slow.written == [b'start', b'snapshot']
+    assert len(snapshots) == 1
+    slow.write_buffer_size = 101
+    broadcast.publish(move, get_snapshot)
+    broadcast.close(b'final')
+    assert slow.written[-1] == b'final' and fast.written[-1] is move
+    assert not fast.is_open and not slow.is_open
+
+
+def test_game_server_spectators():
+    server = GameServer(0)
+    server.start()
+    black, white = [Connection.connect('127.0.0.1', server.port) for _ in range(2)]
+    spectators = [Connection.connect('127.0.0.1', server.port) for _ in range(20)]
+    try:
+        spectators[0].send(Protocol.encode_spectate(0))
+        assert spectators[0].receive_one(2) == (Protocol.REJECT, None)
+        black.send(Protocol.encode_join(6))
+        deadline = time.time() + 2
+        while len(server.lobby) == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        white.send(Protocol.encode_join(6))
+        assert black.receive_one(2)[0] == Protocol.HELLO
+        assert white.receive_one(2)[0] == Protocol.HELLO
+        game = Game(True, 6, False, True, 1)
+        turn = game.get_possible_turns()[0]
+        black.send(Protocol.encode_move(turn.x, turn.y))
+        assert white.receive_one(2) == (Protocol.MOVE, (turn.x, turn.y))
+        game.make_turn(turn)
+        board = game.board
+        for spectator in spectators:
+            spectator.send(Protocol.encode_spectate(0))
+        for spectator in spectators:
+            assert spectator.receive_one(2) == (Protocol.SNAPSHOT, (6, True, board.white, board.black))
+        turn = game.get_possible_turns()[0]
+        white.send(Protocol.encode_move(turn.x, turn.y))
+        for spectator in spectators:
+            assert spectator.receive_one(2) == (Protocol.MOVE, (turn.x, turn.y))
+        spectators[0].send(Protocol.encode_join(6))
+        assert spectators[0].receive_one(2) == (Protocol.REJECT, None)
+        spectators[1].close()
+        deadline = time.time() + 2
+        while len(server.spectators) == 20 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(server.spectators) == 19
+        black.close()
+        deadline = time.time() + 2
+        while any(spectator.is_open for spectator in spectators) and time.time() < deadline:
+            time.sleep(0.01)
+        assert not any(spectator.is_open for spectator in spectators)
+        assert len(server.spectators) == 0
+    finally:
+        for connection in [black, white] + spectators:
+            connection.close()
+        server.close()
+
+
+class RemoteWindow:
+
+    def __init__(self, me_first):
+        self.me_first = me_first
+        self.connection_lost = False
+        self.lines = []
+
+    def log(self, info):
+        self.lines.append(info)
+
+    def remove_button(self, coordinates):
+        pass
+
+    def highlight_buttons(self):
+        pass
+
+
+def test_online_mode_drops_illegal_turns():
+    OnlineMode = pytest.importorskip('OnlineMode').OnlineMode
+    game = Game(True, 8, False, False, 0)
+    window = RemoteWindow(False)
+    online = OnlineMode()
+    online.connection = BufferedConnection()
+    online.apply_turn(game, window, (Protocol.MOVE, game.get_possible_turns()[0].to_tuple()))
+    assert len(game.moves) == 1 and not window.connection_lost
+    game.make_turn(game.get_possible_turns()[0])
+    online.apply_turn(game, window, (Protocol.PASS, None))
+    assert len(game.moves) == 3 and not window.connection_lost
+    local_turn = game.get_possible_turns()[0]
+    out_of_turn = [(Protocol.MOVE, local_turn.to_tuple()), (Protocol.PASS, None)]
+    illegal = [(Protocol.MOVE, (0, 0)), (Protocol.MOVE, (200, 3)), (Protocol.REJECT, None)]
+    for messages in (out_of_turn, illegal):
+        for message in messages:
+            moves = len(game.moves)
+            online.connection = BufferedConnection()
+            window.connection_lost = False
+            online.apply_turn(game, window, message)
+            assert len(game.moves) == moves
+            assert window.connection_lost and not online.connection.is_open
+        game.pass_turn()
+
+
+def test_clients_meet_in_server_lobby():
+    Client = pytest.importorskip('OnlineMode').Client
+    server = GameServer(0)
+    server.start()
+    clients = [Client.from_address(f'127.0.0.1:{server.port}') for _ in range(2)]
+    try:
+        for client in clients:
+            client.start(6)
+        deadline = time.time() + 5
+        while not all(client.is_connected for client in clients) and time.time() < deadline:
+            time.sleep(0.01)
+        assert all(client.is_connected and not client.is_failed for client in clients)
+        assert [(client.board_size, client.is_new) for client in clients] == [(6, True), (6, True)]
+        black, white = sorted(clients, key=lambda client: not client.me_first)
+        assert black.me_first and not white.me_first
+        turn = Game(True, 6, False, True, 1).get_possible_turns()[0]
+        black.connection.send(Protocol.encode_move(turn.x, turn.y))
+        assert white.connection.receive_one(2) == (Protocol.MOVE, (turn.x, turn.y))
+        failed = Client.from_address(f'127.0.0.1:{server.port}')
+        failed.start(5)
+        while not failed.is_failed and time.time() < deadline:
+            time.sleep(0.01)
+        assert failed.is_failed
+    finally:
+        for client in clients:
+            client.close()
+        server.close()
+
+
+def test_game_log_rotation(tmp_path):
+    for number in range(5):
+        name = tmp_path / f'old{number}.txt'
+        name.write_text('x' * 100)
+        os.utime(name, (1000 - number, 1000 - number))
+    log = GameLog(str(tmp_path), 4, 250)
+    for number in range(50):
+        log.write(f'move {number}')
+    log.close()
+    LogWriter.get().wait()
+    assert set(os.listdir(tmp_path)) == {'old0.txt', 'old1.txt', os.path.basename(log.name)}
+    lines = open(log.name).read().splitlines()
+    assert len(lines) == 50 and lines[-1].endswith('move 49')
+
+
+def test_game_archive(tmp_path):
+    archive = GameArchive(str(tmp_path / 'games.db'))
+    try:
+        results = [play_game((number, 6, 'easy', 'normal', 2, number, True)) for number in range(4)]
+        entries = [result['entry'] for result in results]
+        assert archive.add_games(entries) == [1, 2, 3, 4]
+        assert archive.count_games() == 4
+        start = Game(True, 6, False, True, 1)
+        start_hash = start.board.get_hash(False)
+        assert archive.find_games(start_hash) == [(1, 0), (2, 0), (3, 0), (4, 0)]
+        assert sum(archive.get_results(start_hash).values()) == 4
+        game = archive.get_game(3)
+        assert game.score == results[2]['score']
+        hashes = game.get_position_hashes()
+        assert hashes == entries[2][-1]
+        assert hashes[-1] == game.board.get_hash(game.is_white_turn)
+        ply = len(hashes) // 2
+        assert (3, ply) in archive.find_games(hashes[ply])
+        while len(game.moves) > ply:
+            game.undo_turn()
+        assert game.board.get_hash(game.is_white_turn) == hashes[ply]
+        assert archive.add_game(entries[0]) == 5
+        assert len(archive.find_games(start_hash, 2)) == 2
+        archive.MERGE_POSITIONS = 1
+        assert archive.add_game(entries[1]) == 6
+    finally:
+        archive.close()
+    archive = GameArchive(str(tmp_path / 'games.db'))
+    try:
+        assert [game_id for game_id, _ in archive.find_games(start_hash)] == [1, 2, 3, 4, 5, 6]
+        assert (3, ply) in archive.find_games(hashes[ply])
+        assert archive.add_game(entries[2]) == 7
+        assert sum(archive.get_results(start_hash).values()) == 7
+    finally:
+        archive.close()